@@ -1,17 +1,27 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Sequence
 import streamlit as st
 from dotenv import load_dotenv
 
-from src.config import get_settings
-from src.clients import make_clients
-from src.ui import inject_css, hero, sidebar_help
-from src.arxiv import fetch_papers, Paper
-from src.utils import clip, stable_hash, join_nonempty
-from src.rag import build_index, top_k
-from src.prompts import BRIEF_SYSTEM, BRIEF_USER, CHAT_SYSTEM, CHAT_USER
-from src.perplexity_api import web_signals, PerplexityError
+from src.config import CATEGORIES, DEFAULT_KEYWORDS, DEFAULT_MAX_RESULTS, Settings, get_settings
+from src.clients import Clients, make_clients
+from src.ui import inject_css, hero, sidebar_help, stage_progress
+from src.arxiv import Paper
+from src.utils import clip, join_nonempty
+from src.views import load_view, save_briefing, save_view, view_dir
+from src.llm import StreamStats, cached_stream_chat, collect
+from src.prompts import CHAT_SYSTEM, CHAT_USER
+from src.cache import AnswerCache, CompletionCache, EmbeddingCache, make_embedding_cache
+from src.embeddings import EmbedOptions, get_or_embed as embed_cached
+from src.metrics import serve_prometheus, tracer
+from src.shared import SharedView, ViewRegistry, view_version
+
+# Feature modules that pull in numpy, httpx, asyncio or openai (pipeline, retrieval, rerank,
+# full text, briefing, Perplexity) are imported where their feature is first used, so the
+# first render only pays for streamlit and the light modules above.
+# Profile with: python -m bench.startup
 
 load_dotenv()
 
@@ -20,104 +30,130 @@ inject_css()
 hero()
 sidebar_help()
 
+# Per-session state is deliberately tiny: which shared view is open, plus this user's chat.
+# Papers, indexes, briefings, clients and caches live in process-wide st.cache_resource objects.
 def ensure_state():
-    st.session_state.setdefault("papers", [])
-    st.session_state.setdefault("paper_vectors", None)
-    st.session_state.setdefault("paper_texts", [])
-    st.session_state.setdefault("paper_metas", [])
-    st.session_state.setdefault("briefing", "")
-    st.session_state.setdefault("web_signals", "")
+    st.session_state.setdefault("view_key", "")
     st.session_state.setdefault("chat", [])
-    st.session_state.setdefault("emb_cache", {})
+    st.session_state.setdefault("trace_mark", 0)
 
 ensure_state()
 
-def openai_embed(client, model: str, texts: List[str]) -> List[List[float]]:
-    out = []
-    for i in range(0, len(texts), 64):
-        batch = texts[i:i+64]
-        r = client.embeddings.create(model=model, input=batch)
-        out.extend([d.embedding for d in r.data])
-    return out
+@st.cache_resource
+def shared_settings() -> Settings:
+    return get_settings()
+
+@st.cache_resource
+def shared_clients(openai_api_key: str) -> Clients:
+    return make_clients(openai_api_key)
+
+@st.cache_resource
+def shared_views(max_mb: int) -> ViewRegistry:
+    return ViewRegistry(max_bytes=max_mb << 20)
+
+@st.cache_resource
+def shared_emb_cache(backend: str, path: str, max_entries: int) -> EmbeddingCache:
+    # One cache per process, shared by every session (and by other processes for the sqlite backend).
+    return make_embedding_cache(backend, path=path, max_entries=max_entries)
+
+@st.cache_resource
+def shared_llm_cache(path: str, ttl_s: float, max_mb: int, table: str = "llm") -> CompletionCache:
+    return CompletionCache(path, ttl_s=ttl_s, max_bytes=max_mb << 20, table=table)
+
+@st.cache_resource
+def shared_answer_cache(path: str, threshold: float, ttl_s: float, max_entries: int) -> AnswerCache | None:
+    return AnswerCache(path, threshold=threshold, ttl_s=ttl_s, max_entries=max_entries) if max_entries > 0 else None
 
 def get_or_embed(client, model: str, texts: List[str]) -> List[List[float]]:
-    cache = st.session_state["emb_cache"]
-    vecs: List[Any] = [None]*len(texts)
-    missing, missing_meta = [], []
-    for i,t in enumerate(texts):
-        h = stable_hash(model + "::" + t)
-        if h in cache:
-            vecs[i] = cache[h]
-        else:
-            missing.append(t)
-            missing_meta.append((i,h))
-    if missing:
-        new = openai_embed(client, model, missing)
-        for (i,h),v in zip(missing_meta, new):
-            cache[h] = v
-            vecs[i] = v
-    return vecs  # type: ignore
-
-def build_paper_index(openai_client, embed_model: str, papers: List[Paper]):
-    texts, metas = [], []
-    for i, p in enumerate(papers, start=1):
-        text = f"Title: {p.title}\nAbstract: {p.summary}"
-        texts.append(text)
-        metas.append({
-            "pid": f"P{i}",
-            "arxiv_id": p.arxiv_id,
-            "title": p.title,
-            "abs_url": p.abs_url,
-            "pdf_url": p.pdf_url,
-            "published": p.published,
-            "authors": p.authors
-        })
-    vecs = get_or_embed(openai_client, embed_model, texts)
-    st.session_state["paper_texts"] = texts
-    st.session_state["paper_metas"] = metas
-    st.session_state["paper_vectors"] = build_index(vecs, metas, texts)
-
-def make_paper_list(papers: List[Paper]) -> str:
-    return "\n".join([f"[P{i}] {p.title} — {p.abs_url}" for i,p in enumerate(papers, start=1)])
-
-def make_abstract_block(papers: List[Paper]) -> str:
-    blocks = []
-    for i, p in enumerate(papers, start=1):
-        blocks.append(f"[P{i}] {p.title}\n{p.summary}")
-    return "\n\n".join(blocks)
-
-def generate_briefing(openai_client, chat_model: str, papers: List[Paper]) -> str:
-    paper_list = make_paper_list(papers)
-    abstracts = make_abstract_block(papers)
-    prompt = BRIEF_USER.format(paper_list=paper_list, abstracts=abstracts)
-
-    r = openai_client.chat.completions.create(
-        model=chat_model,
-        messages=[
-            {"role":"system","content":BRIEF_SYSTEM},
-            {"role":"user","content":prompt},
-        ],
-        temperature=0.25,
-        max_tokens=1200,
+    return embed_cached(client, model, texts, emb_cache, embed_opts)
+
+def index_paper_fulltext(openai_client, embed_model: str, view: SharedView) -> int:
+    from src.fulltext import index_fulltext
+
+    added, errors = index_fulltext(view.index, view.papers, lambda texts: get_or_embed(openai_client, embed_model, texts))
+    if errors:
+        st.warning(f"Full text skipped for {len(errors)} paper(s): " + ", ".join(pid for pid, _ in errors))
+    return added
+
+def _saved_caption(meta: Dict[str, Any]) -> str:
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(meta["saved_at"])) if meta.get("saved_at") else "earlier"
+    who = "precomputed by the worker" if meta.get("source") == "worker" else "saved"
+    return f"{who} at {when}"
+
+def persist_view(path: str, view: SharedView) -> None:
+    save_view(path, view.papers, view.index, briefing=view.briefing, meta={"source": "app"})
+
+def load_shared_view(path: str) -> SharedView | None:
+    saved = load_view(path)
+    if saved is None:
+        return None
+    from src.dedup import cluster_terms, paper_topics
+
+    papers = saved.papers
+    labels = paper_topics(saved.index, len(papers))
+    # Built before the view is published (as the pipeline does), so the registry counts it and
+    # no session has to build it on a shared view.
+    saved.index.enable_lexical()
+    return SharedView(
+        papers=papers,
+        index=saved.index,
+        briefing=saved.briefing,
+        briefing_stats=_saved_caption(saved.meta) if saved.briefing else "",
+        topic_labels=labels.tolist(),
+        topics=cluster_terms([f"{p.title} {p.summary}" for p in papers], labels),
+        meta=saved.meta,
     )
-    return r.choices[0].message.content or ""
 
-def answer_question(openai_client, chat_model: str, embed_model: str, question: str) -> str:
-    index = st.session_state.get("paper_vectors")
+def open_view(key: str) -> SharedView | None:
+    if not key:
+        return None
+    try:
+        return views.get_or_load(key, lambda: load_shared_view(key))
+    except Exception as e:
+        if debug:
+            st.warning(f"Could not load saved index: {e}")
+        return None
+
+def answer_question(
+    openai_client,
+    chat_model: str,
+    embed_model: str,
+    question: str,
+    on_text=None,
+    stats: StreamStats | None = None,
+    retrieval: str = "hybrid",
+) -> str:
+    index = view.index if view is not None else None
     if not index:
         return "No paper index yet — fetch papers first."
+    from src.rag import hybrid_top_k, top_k
+    from src.rerank import build_context, rerank
+
+    # A near-identical question about the same paper set is answered from the answer cache.
+    qv = None if retrieval == "lexical" else get_or_embed(openai_client, embed_model, [question])[0]
+    scope = AnswerCache.scope(view_version(view), chat_model, retrieval)
+    if answer_cache is not None:
+        with tracer.span("chat_cache.get", retrieval=retrieval) as sp:
+            cached = answer_cache.lookup(scope, question, qv)
+            sp["hit"] = cached is not None
+        if cached is not None:
+            return f"_♻️ Cached answer (similarity {cached.similarity:.2f} to “{clip(cached.question, 80)}”)_\n\n{cached.answer}"
+
+    # Over-fetch, let the reranker keep the useful evidence, then fit it into the context budget.
+    depth = max(8, settings.rerank_candidates)
+    if retrieval == "lexical":
+        hits = hybrid_top_k(index, question, None, k=depth)
+    else:
+        hits = hybrid_top_k(index, question, qv, k=depth) if retrieval == "hybrid" else top_k(index, qv, k=depth)
+    if settings.rerank_candidates > 0:
+        hits = rerank(openai_client, settings.rerank_model or chat_model, question, hits, cache=rerank_cache)
 
-    qv = get_or_embed(openai_client, embed_model, [question])[0]
-    hits = top_k(index, qv, k=8)
-
-    ctx_lines = []
-    for score, meta, txt in hits:
-        pid = meta["pid"]
-        ctx_lines.append(f"[{pid}] {meta['title']}\nURL: {meta['abs_url']}\nEvidence: {txt}\n")
-
-    context = "\n".join(ctx_lines)
+    context, _ = build_context(hits, budget_tokens=settings.chat_context_tokens)
 
-    r = openai_client.chat.completions.create(
+    deltas = cached_stream_chat(
+        openai_client,
+        llm_cache,
+        template=CHAT_USER,
         model=chat_model,
         messages=[
             {"role":"system","content":CHAT_SYSTEM},
@@ -125,23 +161,44 @@ def answer_question(openai_client, chat_model: str, embed_model: str, question:
         ],
         temperature=0.25,
         max_tokens=900,
+        stats=stats,
     )
-    return r.choices[0].message.content or ""
+    answer = collect(deltas, on_text)
+    if answer_cache is not None and answer:
+        answer_cache.put(scope, question, answer, qv)
+    return answer
 
 # Settings + OpenAI
 try:
-    settings = get_settings()
-    clients = make_clients(settings.openai_api_key)
+    settings = shared_settings()
+    clients = shared_clients(settings.openai_api_key)
+    emb_cache = shared_emb_cache(settings.emb_cache_backend, settings.emb_cache_path, settings.emb_cache_max_entries)
+    llm_cache = shared_llm_cache(settings.llm_cache_path, settings.llm_cache_ttl_s, settings.llm_cache_max_mb)
+    # Rerank grades get their own table, so they neither skew the completion hit rate nor evict completions.
+    rerank_cache = shared_llm_cache(settings.llm_cache_path, settings.llm_cache_ttl_s, settings.rerank_cache_max_mb, table="rerank")
+    answer_cache = shared_answer_cache(
+        settings.chat_cache_path, settings.chat_cache_threshold, settings.chat_cache_ttl_s, settings.chat_cache_max_entries,
+    )
+    views = shared_views(settings.shared_views_max_mb)
+    embed_opts = EmbedOptions(max_workers=settings.embed_concurrency, max_batch_tokens=settings.embed_batch_tokens)
+    tracer.set_trace_path(settings.metrics_trace_path)
+    serve_prometheus(settings.metrics_port)
 except Exception as e:
     st.error(str(e))
     st.stop()
 
 with st.sidebar:
     st.markdown("### Controls")
-    category = st.selectbox("arXiv category", ["cs.AI", "cs.CL", "cs.LG", "cs.IR", "cs.CV", "stat.ML"], index=0)
-    max_results = st.slider("Max papers", 10, 50, 20, step=5)
-    keywords = st.text_input("Optional keywords (no URL needed)", value="agents tool use multimodal")
+    category = st.selectbox("arXiv category", list(CATEGORIES), index=0)
+    max_results = st.slider("Max papers", 10, 50, DEFAULT_MAX_RESULTS, step=5)
+    keywords = st.text_input("Optional keywords (no URL needed)", value=DEFAULT_KEYWORDS)
+    use_fulltext = st.toggle("Index full text (PDF, slower)", value=False)
     use_web_signals = st.toggle("Add optional web signals (Perplexity)", value=False)
+    auto_brief = st.toggle("Generate briefing while fetching", value=True)
+    retrieval = st.radio(
+        "Chat retrieval", ["hybrid", "vector", "lexical"], index=0, horizontal=True,
+        help="hybrid = BM25 + embeddings (RRF); lexical needs no embedding call",
+    )
     debug = st.toggle("Debug mode", value=False)
 
     chat_model = st.text_input("OpenAI chat model", value=settings.openai_chat_model)
@@ -150,6 +207,12 @@ with st.sidebar:
     if use_web_signals and not settings.perplexity_api_key:
         st.warning("PERPLEXITY_API_KEY not set. Web signals will be skipped.")
 
+saved_view = view_dir(settings.index_dir, category, keywords, max_results, embed_model, use_fulltext)
+view = open_view(st.session_state["view_key"])
+if view is None:
+    view = open_view(saved_view)
+    st.session_state["view_key"] = saved_view if view is not None else ""
+
 colL, colR = st.columns([1.1, 0.9], gap="large")
 
 with colL:
@@ -159,25 +222,81 @@ with colL:
     st.markdown("</div>", unsafe_allow_html=True)
 
     if fetch_btn:
-        with st.spinner("Fetching latest arXiv papers…"):
-            try:
-                papers = fetch_papers(category=category, max_results=max_results, keyword_query=keywords)
-                st.session_state["papers"] = papers
-                st.session_state["briefing"] = ""
-                st.session_state["web_signals"] = ""
+        from src.pipeline import PipelineRequest, run_pipeline_sync
+
+        st.session_state["trace_mark"] = tracer.mark()
+        progress = st.empty()
+        brief_out = st.empty()
+        req = PipelineRequest(
+            category=category,
+            keywords=keywords,
+            max_results=max_results,
+            embed_model=embed_model,
+            chat_model=chat_model,
+            briefing=auto_brief,
+            perplexity_key=settings.perplexity_api_key if use_web_signals else None,
+            pplx_model=settings.pplx_model,
+        )
+        try:
+            res = run_pipeline_sync(
+                req,
+                openai_client=clients.openai,
+                cache=emb_cache,
+                embed_opts=embed_opts,
+                llm_cache=llm_cache,
+                on_progress=lambda stages: progress.markdown(stage_progress(stages)),
+                on_briefing_text=lambda t: brief_out.markdown(t + "▌"),
+            )
+            brief_out.empty()
+            if "fetch" in res.errors:
+                raise RuntimeError(res.errors["fetch"])
+            for stage, err in res.errors.items():
+                st.error(f"{stage} failed: {err}")
+            if res.index is None:
+                # Without an index there is nothing to chat over, so the fetched papers (and any
+                # briefing or web signals built from them) are not published as the view.
+                st.warning(f"Fetched {len(res.papers)} papers but could not index them, so nothing was loaded. Try again.")
+            else:
                 st.session_state["chat"] = []
-                build_paper_index(clients.openai, embed_model, papers)
-                st.success(f"Loaded {len(papers)} papers.")
-            except Exception as e:
-                st.error(f"Failed to fetch papers: {e}")
+                fresh = SharedView(
+                    papers=res.papers,
+                    index=res.index,
+                    briefing=res.briefing,
+                    briefing_stats=res.briefing_stats.summary() if res.briefing_stats else "",
+                    web_signals=res.web_signals,
+                    topic_labels=res.topic_labels,
+                    topics=res.topics,
+                )
+                # Full text is added before the view is published, so no other session sees a half-built index.
+                if use_fulltext:
+                    with st.spinner("Downloading PDFs and indexing full text…"):
+                        n_chunks = index_paper_fulltext(clients.openai, embed_model, fresh)
+                    st.caption(f"Indexed {n_chunks} full-text chunks.")
+                view = views.put(saved_view, fresh)
+                st.session_state["view_key"] = saved_view
+                try:
+                    persist_view(saved_view, fresh)
+                except Exception as e:
+                    st.warning(f"Could not save the index to disk: {e}")
+                dups = f" ({len(res.duplicates)} duplicates skipped)" if res.duplicates else ""
+                st.success(f"Loaded {len(res.papers)} papers{dups} in {res.wall_s:.1f}s.")
+        except Exception as e:
+            st.error(f"Failed to fetch papers: {e}")
 
-    papers: List[Paper] = st.session_state.get("papers", [])
+    papers: Sequence[Paper] = view.papers if view is not None else []
     if papers:
         st.markdown("### 2) Paper list")
+        labels = view.topic_labels
+        topics = view.topics
+        if len(labels) != len(papers):
+            labels = []
         for i, p in enumerate(papers, start=1):
             title_line = join_nonempty([f"P{i}", clip(p.title, 110)])
             with st.expander(title_line, expanded=(i <= 2)):
                 st.markdown(f"**arXiv:** {p.arxiv_id}")
+                if labels:
+                    terms = ", ".join(topics.get(labels[i-1], [])) or "misc"
+                    st.markdown(f"**Topic {labels[i-1] + 1}:** {terms}")
                 st.markdown(f"**Published:** {p.published or 'n/a'}")
                 st.markdown(f"**Authors:** {', '.join(p.authors[:8])}{'…' if len(p.authors) > 8 else ''}")
                 st.markdown(f"**Abstract:** {p.summary}")
@@ -189,15 +308,31 @@ with colL:
         st.markdown("</div>", unsafe_allow_html=True)
 
         if brief_btn:
-            with st.spinner("Synthesizing briefing from abstracts…"):
-                try:
-                    st.session_state["briefing"] = generate_briefing(clients.openai, chat_model, papers)
-                    st.success("Briefing ready.")
-                except Exception as e:
-                    st.error(f"Failed to generate briefing: {e}")
+            st.session_state["trace_mark"] = tracer.mark()
+            out = st.empty()
+            out.markdown("_Synthesizing briefing from abstracts…_")
+            stats = StreamStats()
+            try:
+                from src.briefing import generate_briefing
+
+                # Streamlit aborts a rerun by raising inside out.markdown; collect() then closes the stream.
+                text = generate_briefing(
+                    clients.openai, chat_model, papers, on_text=lambda t: out.markdown(t + "▌"), stats=stats,
+                    cache=llm_cache, labels=labels or None,
+                )
+                with view.lock:
+                    view.briefing, view.briefing_stats = text, stats.summary()
+                    save_briefing(st.session_state["view_key"], text)
+                out.empty()
+                st.success("Briefing ready.")
+            except Exception as e:
+                out.empty()
+                st.error(f"Failed to generate briefing: {e}")
 
-        if st.session_state.get("briefing"):
-            st.markdown(st.session_state["briefing"])
+        if view.briefing:
+            st.markdown(view.briefing)
+            if view.briefing_stats:
+                st.caption(view.briefing_stats)
 
         if use_web_signals and papers and settings.perplexity_api_key:
             st.markdown("### 4) Optional web signals (Perplexity)")
@@ -206,27 +341,49 @@ with colL:
             st.markdown("</div>", unsafe_allow_html=True)
 
             if ws_btn:
+                from src.perplexity_api import PerplexityError, web_signals
+
                 with st.spinner("Pulling recent web signals…"):
                     try:
-                        theme_seed = st.session_state.get("briefing") or ("Themes: " + (keywords or category))
-                        st.session_state["web_signals"] = web_signals(
+                        theme_seed = view.briefing or ("Themes: " + (keywords or category))
+                        signals = web_signals(
                             settings.perplexity_api_key,
                             model=settings.pplx_model,
                             theme_summary=theme_seed[:3500],
                         )
+                        with view.lock:
+                            view.web_signals = signals
                         st.success("Web signals ready.")
                     except PerplexityError as e:
                         st.error(f"Perplexity failed: {e}")
                     except Exception as e:
                         st.error(f"Unexpected error: {e}")
 
-            if st.session_state.get("web_signals"):
-                st.markdown(st.session_state["web_signals"])
+            if view.web_signals:
+                st.markdown(view.web_signals)
 
         if debug:
             st.markdown("### Debug")
             st.write(f"papers={len(papers)}")
-            st.write(f"index_ready={st.session_state.get('paper_vectors') is not None}")
+            st.write(f"index_rows={len(view.index)}")
+            st.write({
+                "completion_cache": llm_cache.stats(),
+                "rerank_cache": rerank_cache.stats(),
+                "answer_cache": answer_cache.stats() if answer_cache is not None else "off",
+                "shared_views": views.stats(),
+            })
+
+            st.markdown("#### Performance")
+            last = tracer.summary(since=st.session_state["trace_mark"])
+            if last:
+                cost = sum(r["cost_usd"] for r in last)
+                st.caption(f"Spans since the last fetch/briefing/question (slowest first) · est. cost ${cost:.4f}")
+                st.dataframe(last, use_container_width=True, hide_index=True)
+            with st.expander("All spans in this process"):
+                st.dataframe(tracer.summary(), use_container_width=True, hide_index=True)
+            c1, c2 = st.columns(2)
+            c1.download_button("Trace (JSONL)", tracer.jsonl(), file_name="arxivpulse-trace.jsonl")
+            c2.download_button("Metrics (Prometheus)", tracer.prometheus(), file_name="arxivpulse-metrics.prom")
 
 with colR:
     st.markdown("### 5) Chat with papers (RAG + citations)")
@@ -239,17 +396,25 @@ with colR:
 
         q = st.chat_input("Ask: 'What are the top agent patterns and what should I build next?'")
         if q:
+            st.session_state["trace_mark"] = tracer.mark()
             st.session_state["chat"].append({"role":"user","content":q})
             with st.chat_message("user"):
                 st.markdown(q)
 
             with st.chat_message("assistant"):
-                with st.spinner("Retrieving evidence from papers + answering…"):
-                    try:
-                        ans = answer_question(clients.openai, chat_model, embed_model, q)
-                    except Exception as e:
-                        ans = f"Sorry — error: {e}"
-                st.markdown(ans)
+                out = st.empty()
+                out.markdown("_Retrieving evidence from papers…_")
+                stats = StreamStats()
+                try:
+                    ans = answer_question(
+                        clients.openai, chat_model, embed_model, q, on_text=lambda t: out.markdown(t + "▌"), stats=stats,
+                        retrieval=retrieval,
+                    )
+                except Exception as e:
+                    ans = f"Sorry — error: {e}"
+                out.markdown(ans)
+                if stats.ttft_s is not None:
+                    st.caption(stats.summary())
 
             st.session_state["chat"].append({"role":"assistant","content":ans})
 
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+# Recall@k and latency of the IVF backend against exact search, across nprobe values.
+#   python -m bench.ann --n 200000 --dim 256 --quantize int8
+
+import argparse
+import time
+import numpy as np
+
+from src.ann import IVFParams, recall_at_k
+from src.rag import build_index, top_k
+
+def clustered(n: int, dim: int, topics: int, rng: np.random.Generator) -> np.ndarray:
+    # Real abstract embeddings are clumpy; a Gaussian mixture is a closer stand-in than white noise.
+    centers = rng.standard_normal((topics, dim), dtype=np.float32)
+    X = centers[rng.integers(0, topics, size=n)]
+    X += 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    return X
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=256)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nlist", type=int, default=0)
+    ap.add_argument("--quantize", choices=["none", "int8"], default="none")
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    V = clustered(args.n, args.dim, max(8, args.n // 500), rng)
+    Q = V[rng.choice(args.n, size=args.queries, replace=False)] + 0.3 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    metas = [{"pid": f"P{i+1}"} for i in range(args.n)]
+
+    exact = build_index(V, metas, [""] * args.n)
+    t0 = time.perf_counter()
+    approx = build_index(V, metas, [""] * args.n, ann=IVFParams(nlist=args.nlist, quantize=args.quantize))
+    t_train = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for q in Q:
+        top_k(exact, q, k=args.k)
+    t_exact = (time.perf_counter() - t0) / args.queries
+    print(f"n={args.n} dim={args.dim} nlist={len(approx.ann.centroids)} quantize={args.quantize} train={t_train:.2f}s")
+    print(f"exact          : {t_exact*1e3:8.3f} ms/query  recall@{args.k}=1.000")
+    for nprobe in args.nprobe:
+        t0 = time.perf_counter()
+        for q in Q:
+            top_k(approx, q, k=args.k, nprobe=nprobe)
+        t = (time.perf_counter() - t0) / args.queries
+        r = recall_at_k(approx, Q, k=args.k, nprobe=nprobe)
+        print(f"ivf nprobe={nprobe:<4d}: {t*1e3:8.3f} ms/query  recall@{args.k}={r:.3f}  speedup={t_exact/t:.1f}x")
+
+if __name__ == "__main__":
+    main()
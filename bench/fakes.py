@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+# Local stand-ins for arXiv, OpenAI and Perplexity so benchmarks run offline and repeatably.
+#   - atom_chunks / atom_feed: Atom pages shaped like export.arxiv.org/api/query responses
+#   - fake_http_client: httpx.Client whose transport serves arXiv pages and Perplexity chat
+#   - FakeOpenAI: deterministic embeddings and canned streamed chat, with configurable latency
+
+import hashlib
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Iterator, List
+from urllib.parse import parse_qs
+import httpx
+import numpy as np
+
+_WORDS = (
+    "agent tool planning reasoning retrieval multimodal vision language model benchmark alignment "
+    "reward policy diffusion transformer attention sparse mixture expert token context memory graph "
+    "federated privacy robust adversarial distillation quantization inference latency throughput "
+    "evaluation dataset synthetic instruction tuning preference feedback code program search"
+).split()
+
+def abstract_text(i: int, words: int = 160) -> str:
+    rng = np.random.default_rng(i)
+    topic = rng.choice(len(_WORDS), size=6, replace=False)
+    # Mostly topic words plus a unique tail, so abstracts cluster but are not near-duplicates.
+    picks = np.where(rng.random(words) < 0.4, rng.choice(topic, size=words), rng.integers(0, len(_WORDS), size=words))
+    return " ".join(_WORDS[j] for j in picks) + f" id{i} run{rng.integers(1 << 30)}"
+
+def atom_entry(i: int) -> str:
+    aid = f"{2400 + i // 100_000:04d}.{i % 100_000:05d}v1"
+    day = 28 - (i // 1000) % 28
+    return (
+        "<entry>"
+        f"<id>http://arxiv.org/abs/{aid}</id>"
+        f"<updated>2024-06-{day:02d}T12:00:00Z</updated><published>2024-06-{day:02d}T12:00:00Z</published>"
+        f"<title>Synthetic paper {i}: {' '.join(abstract_text(i, 8).split()[:6])}</title>"
+        f"<summary>{abstract_text(i)}</summary>"
+        f"<author><name>Author {i % 997}</name></author><author><name>Author {(i * 7) % 997}</name></author>"
+        f'<link href="http://arxiv.org/abs/{aid}" rel="alternate" type="text/html"/>'
+        f'<link title="pdf" href="http://arxiv.org/pdf/{aid}" rel="related" type="application/pdf"/>'
+        '<arxiv:primary_category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>'
+        '<category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>'
+        "</entry>"
+    )
+
+_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" '
+    'xmlns:arxiv="http://arxiv.org/schemas/atom">'
+    "<title>ArXiv Query</title>"
+)
+
+def atom_chunks(start: int, n: int, total: int, entries_per_chunk: int = 64) -> Iterator[bytes]:
+    """Stream one result page as byte chunks without materializing the whole document."""
+    end = min(total, start + n)
+    yield (_HEAD + f"<opensearch:totalResults>{total}</opensearch:totalResults>"
+           f"<opensearch:startIndex>{start}</opensearch:startIndex>").encode()
+    for s in range(start, end, entries_per_chunk):
+        yield "".join(atom_entry(i) for i in range(s, min(end, s + entries_per_chunk))).encode()
+    yield b"</feed>"
+
+def atom_feed(start: int, n: int, total: int) -> bytes:
+    return b"".join(atom_chunks(start, n, total))
+
+@dataclass
+class Latency:
+    arxiv_s: float = 0.0        # per arXiv page
+    embed_s: float = 0.0        # per embeddings request
+    ttft_s: float = 0.0         # chat: time to first token
+    token_s: float = 0.0        # chat: per streamed token
+    perplexity_s: float = 0.0   # per Perplexity request
+
+def fake_http_client(total: int, latency: Latency | None = None) -> httpx.Client:
+    latency = latency or Latency()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "export.arxiv.org":
+            q = {k: v[0] for k, v in parse_qs(request.url.query.decode()).items()}
+            time.sleep(latency.arxiv_s)
+            body = atom_feed(int(q.get("start", 0)), int(q.get("max_results", 10)), total)
+            return httpx.Response(200, content=body, headers={"Content-Type": "application/atom+xml"})
+        if request.url.host == "api.perplexity.ai":
+            time.sleep(latency.perplexity_s)
+            content = "\n".join(f"- Signal {i} — https://example.com/{i} — why it matters." for i in range(8))
+            return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+        return httpx.Response(404, text=f"no fake for {request.url}")
+
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    v = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (v / np.linalg.norm(v)).tolist()
+
+_REPLY = ("Key themes [P1] and [P2]: agents are moving from demos to tooling; evaluation remains the "
+          "bottleneck [P3]. Build: retrieval-grounded copilots with audit trails [P1].").split(" ")
+
+class FakeOpenAI:
+    """Quacks like openai.OpenAI for `embeddings.create` and streamed `chat.completions.create`."""
+
+    def __init__(self, dim: int = 256, latency: Latency | None = None):
+        self.dim = dim
+        self.latency = latency or Latency()
+        self.calls = {"embeddings": 0, "chat": 0}
+        self.embeddings = SimpleNamespace(create=self._embed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+
+    def _embed(self, *, model: str, input: List[str], **_):
+        self.calls["embeddings"] += 1
+        time.sleep(self.latency.embed_s)
+        data = [SimpleNamespace(index=i, embedding=fake_embedding(t, self.dim)) for i, t in enumerate(input)]
+        return SimpleNamespace(data=data, usage=SimpleNamespace(prompt_tokens=sum(len(t) // 4 for t in input)))
+
+    def _chat(self, *, messages, max_tokens: int = 256, stream: bool = False, **_):
+        self.calls["chat"] += 1
+        words = _REPLY[:max_tokens]
+        prompt_tokens = sum(len(m["content"]) // 4 for m in messages)
+        lat = self.latency
+
+        def gen():
+            time.sleep(lat.ttft_s)
+            for w in words:
+                time.sleep(lat.token_s)
+                yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=w + " "))])
+            usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(words))
+            yield SimpleNamespace(usage=usage, choices=[])
+
+        if not stream:
+            msg = SimpleNamespace(content=" ".join(words))
+            return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+        return gen()
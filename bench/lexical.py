@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+# BM25 build time and query latency on a synthetic abstract corpus.
+#   python -m bench.lexical --n 50000
+
+import argparse
+import time
+import numpy as np
+
+from src.lexical import LexicalIndex
+
+def synthetic_corpus(n: int, rng: np.random.Generator, vocab: int = 30_000, words: int = 180):
+    # Zipf-distributed vocabulary roughly matches word frequencies in abstracts.
+    lex = [f"w{i}" for i in range(vocab)] + ["gpt-4o", "llama-3.1", "mmlu", "swe-bench", "rlhf"]
+    ranks = np.minimum(rng.zipf(1.15, size=(n, words)), len(lex)) - 1
+    return [" ".join(lex[j] for j in row) for row in ranks]
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20_000)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--k", type=int, default=10)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    docs = synthetic_corpus(args.n, rng)
+    t0 = time.perf_counter()
+    lex = LexicalIndex()
+    lex.add(docs)
+    lex.search("warmup")
+    t_build = time.perf_counter() - t0
+
+    queries = [" ".join(rng.choice(docs[rng.integers(args.n)].split(), size=3)) for _ in range(args.queries)]
+    queries += ["gpt-4o swe-bench", "llama-3.1 mmlu rlhf"]
+    lat = []
+    for q in queries:
+        t0 = time.perf_counter()
+        lex.search(q, args.k)
+        lat.append(time.perf_counter() - t0)
+    lat_ms = np.array(lat) * 1e3
+    print(f"docs={args.n} vocab={len(lex.vocab)} build={t_build:.2f}s")
+    print(f"query latency ms: p50={np.percentile(lat_ms, 50):.3f} p95={np.percentile(lat_ms, 95):.3f} p99={np.percentile(lat_ms, 99):.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+# Cold-start benchmark: what the app imports before its first render, and how long that render takes.
+#   python -m bench.startup --out startup.json
+#   python -m bench.startup --scenarios imports --modules src.pipeline,openai
+#
+# Every measurement runs in a fresh interpreter, so nothing is already in sys.modules.
+# Scenarios:
+#   app_imports   the top-level imports of app.py (what every first render pays): total time,
+#                 slowest modules (python -X importtime) and which heavy packages got loaded
+#   imports       standalone import cost of each module in --modules
+#   first_render  streamlit.testing AppTest runs app.py once with empty caches (no saved view);
+#                 wall time from process spawn to rendered page, median of --runs
+# Results are one JSON document: {"env": {...}, "results": [{"scenario", ...metrics}]}.
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from bench.suite import _env
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("numpy", "httpx", "asyncio", "openai", "pypdf")
+DEFAULT_MODULES = (
+    "streamlit,openai,numpy,httpx,src.config,src.clients,src.arxiv,src.views,src.cache,src.shared,"
+    "src.rag,src.pipeline,src.rerank,src.fulltext,src.perplexity_api"
+)
+
+def _run(code: str, *, importtime: bool = False, env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(cmd, cwd=ROOT, env={**os.environ, **(env or {})}, capture_output=True, text=True)
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of `python -X importtime` output: module, depth, self_ms, cumulative_ms."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        head, cum_us, name = line.split("|", 2)
+        self_us = head.split(":", 1)[1]
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip(" "))) // 2,
+            "self_ms": round(int(self_us) / 1e3, 2),
+            "cumulative_ms": round(int(cum_us) / 1e3, 2),
+        })
+    return rows
+
+_MARK = "-- probe --"
+
+def _profile(code: str, top: int) -> Dict[str, Any]:
+    # The marker separates interpreter startup (site, encodings, ...) from the probed imports.
+    probe = (
+        f"import sys, json, time\nsys.stderr.write({_MARK!r} + '\\n')\nt0 = time.perf_counter()\n{code}\n"
+        f"print(json.dumps([time.perf_counter() - t0, [m for m in {HEAVY!r} if m in sys.modules]]))"
+    )
+    r = _run(probe, importtime=True)
+    if r.returncode != 0:
+        return {"error": (r.stderr.strip().splitlines() or ["failed"])[-1]}
+    elapsed, heavy = json.loads(r.stdout.strip().splitlines()[-1])
+    rows = parse_importtime(r.stderr.split(_MARK, 1)[-1])
+    return {
+        "total_ms": round(elapsed * 1e3, 1),
+        "modules": len(rows),
+        "heavy_loaded": heavy,
+        "slowest": sorted(rows, key=lambda row: -row["self_ms"])[:top],
+    }
+
+def app_import_code(path: str) -> str:
+    """The module-level import statements of a script, as source."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(
+        ast.unparse(node) for node in tree.body
+        if isinstance(node, ast.Import) or (isinstance(node, ast.ImportFrom) and node.module != "__future__")
+    )
+
+def bench_app_imports(top: int) -> Dict[str, Any]:
+    return _profile(app_import_code(os.path.join(ROOT, "app.py")), top)
+
+def bench_imports(modules: List[str], top: int) -> List[Dict[str, Any]]:
+    return [{"module": m, **_profile(f"import {m}", top)} for m in modules]
+
+_RENDER = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_streamlit_s": t1 - t0,
+    "script_s": t2 - t1,
+    "exceptions": [str(e.value) for e in at.exception],
+    "heavy_loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY,)
+
+def bench_first_render(runs: int) -> Dict[str, Any]:
+    walls: List[float] = []
+    last: Dict[str, Any] = {}
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as d:
+            env = {
+                "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-startup-bench"),
+                "INDEX_DIR": os.path.join(d, "indexes"),
+                "EMB_CACHE_PATH": os.path.join(d, "emb.sqlite3"),
+                "LLM_CACHE_PATH": os.path.join(d, "llm.sqlite3"),
+                "CHAT_CACHE_PATH": os.path.join(d, "answers.sqlite3"),
+            }
+            t0 = time.perf_counter()
+            r = _run(_RENDER, env=env)
+            wall = time.perf_counter() - t0
+        if r.returncode != 0:
+            return {"error": (r.stderr.strip().splitlines() or ["failed"])[-1]}
+        last = json.loads(r.stdout.strip().splitlines()[-1])
+        walls.append(wall)
+    walls.sort()
+    return {
+        "runs": runs,
+        "time_to_first_render_s": round(walls[len(walls) // 2], 3),
+        "min_s": round(walls[0], 3),
+        "import_streamlit_s": round(last["import_streamlit_s"], 3),
+        "script_s": round(last["script_s"], 3),
+        "heavy_loaded": last["heavy_loaded"],
+        "exceptions": last["exceptions"],
+    }
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scenarios", default="app_imports,imports,first_render")
+    ap.add_argument("--modules", default=DEFAULT_MODULES)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=10, help="slowest modules listed per profile")
+    ap.add_argument("--out", default="", help="write JSON here instead of stdout")
+    args = ap.parse_args()
+
+    scenarios = {s.strip() for s in args.scenarios.split(",") if s.strip()}
+    results: List[Dict[str, Any]] = []
+
+    def record(scenario: str, metrics: Dict[str, Any]) -> None:
+        results.append({"scenario": scenario, **metrics})
+        print(f"[bench] {scenario} done", file=sys.stderr, flush=True)
+
+    if "app_imports" in scenarios:
+        record("app_imports", bench_app_imports(args.top))
+    if "imports" in scenarios:
+        for row in bench_imports([m.strip() for m in args.modules.split(",") if m.strip()], args.top):
+            record("imports", row)
+    if "first_render" in scenarios:
+        record("first_render", bench_first_render(args.runs))
+
+    doc = json.dumps({"env": _env(), "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(doc + "\n")
+    else:
+        print(doc)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+# Offline benchmark suite against the local fakes in bench/fakes.py; no API keys or network.
+#   python -m bench.suite --sizes 50,5000,500000 --out bench-results.json
+#   python -m bench.suite --sizes 50 --embed-latency 0.05 --ttft 0.3
+#
+# Scenarios per size n:
+#   parse     Atom feed -> Paper objects (iter_feed), papers/s
+#   index     build_index over n fake embeddings (vectors + BM25), seconds
+#   query     top_k / hybrid_top_k latency percentiles
+#   pipeline  run_pipeline end to end (fetch, dedup, embed, topics, briefing, web signals)
+#   memory    retained bytes of the parsed papers plus the index's text/metadata columns, for
+#             per-row objects (before and after slots/interning) vs the columnar PaperStore
+# Results are one JSON document: {"env": {...}, "results": [{"scenario", "n", ...metrics}]}.
+# Diff two runs with e.g. `jq -S .results` or load them into a dataframe.
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+
+from bench.fakes import FakeOpenAI, Latency, abstract_text, atom_chunks, fake_http_client
+from src.arxiv import Paper, iter_feed
+from src.cache import MemoryEmbeddingCache
+from src.corpus import paper_records
+from src.embeddings import EmbedOptions
+from src.http_client import close_client, response_cache, set_client
+from src.paper_store import PaperStore, StoreMetas, StoreTexts
+from src.pipeline import PipelineRequest, run_pipeline
+from src.rag import VectorIndex, build_index, hybrid_top_k, top_k
+
+def _percentiles(lat_s: List[float]) -> Dict[str, float]:
+    ms = np.asarray(lat_s) * 1e3
+    return {f"p{p}_ms": round(float(np.percentile(ms, p)), 4) for p in (50, 95, 99)}
+
+def bench_parse(n: int) -> Dict[str, Any]:
+    # The feed is generated on the fly (500k entries is ~1 GB of XML); its generation time is
+    # measured on its own and subtracted, leaving parse time.
+    t0 = time.perf_counter()
+    size = sum(len(c) for c in atom_chunks(0, n, n))
+    t_gen = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    count = sum(1 for _ in iter_feed(atom_chunks(0, n, n)))
+    dt = max(1e-9, time.perf_counter() - t0 - t_gen)
+    return {"papers": count, "bytes": size, "seconds": round(dt, 4), "papers_per_s": round(count / dt, 1),
+            "mb_per_s": round(size / dt / 2**20, 1)}
+
+def _corpus(n: int, dim: int, texts: bool, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    V = rng.standard_normal((n, dim), dtype=np.float32)
+    metas = [{"pid": f"P{i+1}", "title": f"Synthetic paper {i}"} for i in range(n)]
+    body = [f"Title: Synthetic paper {i}\nAbstract: {abstract_text(i, 60)}" if texts else "" for i in range(n)]
+    return V, metas, body
+
+def bench_index(n: int, dim: int, lexical: bool) -> Tuple[Dict[str, Any], VectorIndex]:
+    V, metas, texts = _corpus(n, dim, texts=lexical)
+    t0 = time.perf_counter()
+    index = build_index(V, metas, texts, lexical=False)
+    t_vec = time.perf_counter() - t0
+    out: Dict[str, Any] = {"dim": dim, "vector_s": round(t_vec, 4), "vector_mb": round(index.vectors.nbytes / 2**20, 1)}
+    if lexical:
+        t0 = time.perf_counter()
+        index.enable_lexical().search("warmup")
+        out["lexical_s"] = round(time.perf_counter() - t0, 4)
+    else:
+        out["lexical_s"] = None
+    return out, index
+
+def bench_query(index: VectorIndex, n_queries: int, k: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(1)
+    Q = rng.standard_normal((n_queries, index.dim), dtype=np.float32)
+    words = ["agent", "retrieval", "benchmark", "diffusion", "alignment", "quantization", "memory"]
+    qs = [" ".join(rng.choice(words, size=3)) for _ in range(n_queries)]
+    top_k(index, Q[0], k=k)
+    vec = []
+    for q in Q:
+        t0 = time.perf_counter()
+        top_k(index, q, k=k)
+        vec.append(time.perf_counter() - t0)
+    out: Dict[str, Any] = {"k": k, "queries": n_queries, "top_k": _percentiles(vec)}
+    if index.lexical is not None:
+        hyb = []
+        for q, text in zip(Q, qs):
+            t0 = time.perf_counter()
+            hybrid_top_k(index, text, q, k=k)
+            hyb.append(time.perf_counter() - t0)
+        out["hybrid_top_k"] = _percentiles(hyb)
+    return out
+
+def bench_pipeline(n: int, dim: int, latency: Latency, with_signals: bool) -> Dict[str, Any]:
+    set_client(fake_http_client(n, latency))
+    response_cache.clear()
+    client = FakeOpenAI(dim=dim, latency=latency)
+    req = PipelineRequest(
+        category="cs.AI",
+        keywords="",
+        max_results=n,
+        embed_model="fake-embed",
+        chat_model="fake-chat",
+        perplexity_key="fake" if with_signals else None,
+        arxiv_delay_s=0.0,
+        embed_batch=max(16, n // 64),
+    )
+    t0 = time.perf_counter()
+    res = asyncio.run(run_pipeline(req, openai_client=client, cache=MemoryEmbeddingCache(max_entries=n + 1), embed_opts=EmbedOptions()))
+    wall = time.perf_counter() - t0
+    close_client()
+    return {
+        "wall_s": round(wall, 4),
+        "papers": len(res.papers),
+        "errors": res.errors,
+        "stages_s": {name: round(s.elapsed_s, 4) for name, s in res.stages.items()},
+        "api_calls": dict(client.calls),
+        "latency": vars(latency),
+    }
+
+# Paper as it was before slots and author interning: a per-instance __dict__ and one string per author name.
+_DictPaper = make_dataclass("_DictPaper", [f.name for f in fields(Paper)])
+
+def _retained(build: Callable[[], Any]) -> Tuple[int, Any]:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, held
+
+def bench_memory(n: int) -> Dict[str, Any]:
+    def dict_objects():
+        papers = [
+            _DictPaper(**{f.name: getattr(p, f.name) for f in fields(Paper)} | {"authors": [a.encode().decode() for a in p.authors]})
+            for p in iter_feed(atom_chunks(0, n, n))
+        ]
+        return papers, paper_records(papers)
+
+    def slot_objects():
+        papers = list(iter_feed(atom_chunks(0, n, n)))
+        return papers, paper_records(papers)
+
+    def store():
+        s = PaperStore(iter_feed(atom_chunks(0, n, n)))
+        return s, StoreTexts(s), StoreMetas(s)
+
+    out: Dict[str, Any] = {}
+    for name, build in (("dict_objects", dict_objects), ("slot_objects", slot_objects), ("paper_store", store)):
+        size, held = _retained(build)
+        out[f"{name}_mb_per_100k"] = round(size / n * 100_000 / 2**20, 1)
+        del held
+    out["reduction_x"] = round(out["dict_objects_mb_per_100k"] / max(out["paper_store_mb_per_100k"], 1e-9), 2)
+    return out
+
+def _env() -> Dict[str, Any]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        rev = ""
+    return {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git": rev,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="50,5000,500000")
+    ap.add_argument("--scenarios", default="parse,index,query,pipeline,memory")
+    ap.add_argument("--dim", type=int, default=256)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=8)
+    ap.add_argument("--lexical-max", type=int, default=50_000, help="skip BM25 build above this many docs")
+    ap.add_argument("--pipeline-max", type=int, default=5_000, help="skip the end-to-end run above this many papers")
+    ap.add_argument("--memory-max", type=int, default=100_000, help="skip the memory scenario above this many papers")
+    ap.add_argument("--arxiv-latency", type=float, default=0.0)
+    ap.add_argument("--embed-latency", type=float, default=0.02)
+    ap.add_argument("--ttft", type=float, default=0.1)
+    ap.add_argument("--token-latency", type=float, default=0.0)
+    ap.add_argument("--perplexity-latency", type=float, default=0.2)
+    ap.add_argument("--out", default="", help="write JSON here instead of stdout")
+    args = ap.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    scenarios = {s.strip() for s in args.scenarios.split(",") if s.strip()}
+    latency = Latency(args.arxiv_latency, args.embed_latency, args.ttft, args.token_latency, args.perplexity_latency)
+    results: List[Dict[str, Any]] = []
+
+    def record(scenario: str, n: int, metrics: Dict[str, Any]) -> None:
+        results.append({"scenario": scenario, "n": n, **metrics})
+        print(f"[bench] {scenario} n={n} done", file=sys.stderr, flush=True)
+
+    for n in sizes:
+        if "parse" in scenarios:
+            record("parse", n, bench_parse(n))
+        if "index" in scenarios or "query" in scenarios:
+            metrics, index = bench_index(n, args.dim, lexical=n <= args.lexical_max)
+            record("index", n, metrics)
+            if "query" in scenarios:
+                record("query", n, bench_query(index, args.queries, args.k))
+            del index
+        if "pipeline" in scenarios:
+            if n > args.pipeline_max:
+                record("pipeline", n, {"skipped": f"n > --pipeline-max {args.pipeline_max}"})
+            else:
+                record("pipeline", n, bench_pipeline(n, args.dim, latency, with_signals=True))
+        if "memory" in scenarios:
+            if n > args.memory_max:
+                record("memory", n, {"skipped": f"n > --memory-max {args.memory_max}"})
+            else:
+                record("memory", n, bench_memory(n))
+
+    doc = json.dumps({"env": _env(), "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(doc + "\n")
+    else:
+        print(doc)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+# Compare looping top_k against one top_k_batch call.
+#   python -m bench.topk --n 50000 --dim 1536 --queries 64
+
+import argparse
+import time
+import numpy as np
+
+from src.rag import build_index, top_k, top_k_batch
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20_000)
+    ap.add_argument("--dim", type=int, default=1536)
+    ap.add_argument("--queries", type=int, default=64)
+    ap.add_argument("--k", type=int, default=8)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    V = rng.standard_normal((args.n, args.dim), dtype=np.float32)
+    Q = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    index = build_index(V, [{"pid": f"P{i+1}"} for i in range(args.n)], [""] * args.n)
+
+    loop = [top_k(index, q, k=args.k) for q in Q]
+    batch = top_k_batch(index, Q, k=args.k)
+    same = all([m["pid"] for _, m, _ in a] == [m["pid"] for _, m, _ in b] for a, b in zip(loop, batch))
+
+    t_loop = _best_of(lambda: [top_k(index, q, k=args.k) for q in Q], args.repeat)
+    t_batch = _best_of(lambda: top_k_batch(index, Q, k=args.k), args.repeat)
+    print(f"n={args.n} dim={args.dim} queries={args.queries} k={args.k} same_results={same}")
+    print(f"loop top_k : {t_loop*1e3:9.2f} ms  ({t_loop/args.queries*1e3:.3f} ms/query)")
+    print(f"top_k_batch: {t_batch*1e3:9.2f} ms  ({t_batch/args.queries*1e3:.3f} ms/query)")
+    print(f"speedup    : {t_loop/t_batch:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import numpy as np
+
+# Inverted-file (IVF) approximate search over L2-normalized rows, pure NumPy.
+# Coarse quantizer: spherical k-means. Optional int8 codes for the candidate scan,
+# followed by an exact float32 re-score of the best candidates.
+
+@dataclass(frozen=True)
+class IVFParams:
+    nlist: int = 0            # number of coarse cells; 0 -> ~4*sqrt(n)
+    nprobe: int = 8           # cells scanned per query (recall vs latency knob)
+    quantize: str = "none"    # "none" or "int8"
+    rerank: int = 4           # with int8, exact re-score of k*rerank candidates
+    train_size: int = 64      # k-means training points per cell
+    iters: int = 15
+    seed: int = 0
+
+def _argmax_blocks(X: np.ndarray, C: np.ndarray, block: int = 16384) -> np.ndarray:
+    out = np.empty(len(X), dtype=np.int32)
+    for s in range(0, len(X), block):
+        out[s:s+block] = np.argmax(X[s:s+block] @ C.T, axis=1)
+    return out
+
+def kmeans(X: np.ndarray, k: int, *, iters: int = 20, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means on L2-normalized rows. Returns (centroids, assignment)."""
+    X = np.asarray(X, dtype=np.float32)
+    n = len(X)
+    k = max(1, min(int(k), n))
+    rng = np.random.default_rng(seed)
+    C = X[rng.choice(n, size=k, replace=False)].copy()
+    assign = np.zeros(n, dtype=np.int32)
+    for it in range(iters):
+        new = _argmax_blocks(X, C)
+        if it and np.array_equal(new, assign):
+            break
+        assign = new
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+        C[nonempty] = np.add.reduceat(X[order], starts, axis=0)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            C[empty] = X[rng.choice(n, size=len(empty), replace=False)]
+        C /= np.linalg.norm(C, axis=1, keepdims=True) + 1e-12
+    return C, assign
+
+class IVFIndex:
+    def __init__(self, centroids: np.ndarray, params: IVFParams):
+        self.centroids = centroids
+        self.params = params
+        self.assign = np.empty(0, dtype=np.int32)
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, params: IVFParams) -> "IVFIndex":
+        n = len(vectors)
+        nlist = params.nlist or max(1, int(4 * np.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(params.seed)
+        m = min(n, nlist * params.train_size)
+        sample = vectors if m == n else vectors[np.sort(rng.choice(n, size=m, replace=False))]
+        C, _ = kmeans(sample, nlist, iters=params.iters, seed=params.seed)
+        ivf = cls(C, params)
+        ivf.add(vectors)
+        return ivf
+
+    def add(self, vectors: np.ndarray) -> None:
+        if not len(vectors):
+            return
+        self.assign = np.concatenate([self.assign, _argmax_blocks(vectors, self.centroids)])
+        if self.params.quantize == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0 + 1e-12
+            codes = np.round(vectors / scales[:, None]).astype(np.int8)
+            self.codes = codes if self.codes is None else np.concatenate([self.codes, codes])
+            self.scales = scales.astype(np.float32) if self.scales is None else np.concatenate([self.scales, scales.astype(np.float32)])
+        self._order = None
+
+    def keep(self, rows: np.ndarray) -> None:
+        self.assign = self.assign[rows]
+        if self.codes is not None:
+            self.codes = self.codes[rows]
+            self.scales = self.scales[rows]
+        self._order = None
+
+    def _lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._order is None:
+            self._order = np.argsort(self.assign, kind="stable")
+            counts = np.bincount(self.assign, minlength=len(self.centroids))
+            self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        return self._order, self._offsets  # type: ignore[return-value]
+
+    def search(self, vectors: np.ndarray, q: np.ndarray, k: int, nprobe: int | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        order, offsets = self._lists()
+        nprobe = min(nprobe or self.params.nprobe, len(self.centroids))
+        cs = self.centroids @ q
+        probe = np.argpartition(-cs, nprobe - 1)[:nprobe]
+        cand = np.concatenate([order[offsets[c]:offsets[c+1]] for c in probe])
+        if not len(cand):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if self.codes is not None:
+            approx = (self.codes[cand] @ q) * self.scales[cand]
+            m = min(len(cand), k * max(1, self.params.rerank))
+            cand = cand[np.argpartition(-approx, m - 1)[:m]]
+        sims = vectors[cand] @ q
+        k = min(k, len(cand))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return cand[top], sims[top]
+
+def recall_at_k(index, Q: np.ndarray, k: int = 10, nprobe: int | None = None) -> float:
+    """Fraction of exact top-k neighbours that the ANN backend of `index` returns."""
+    from src.rag import l2_normalize
+    if index.ann is None:
+        return 1.0
+    Qn = l2_normalize(Q).reshape(-1, index.dim)
+    V = index.vectors
+    k = min(k, len(V))
+    exact = np.argpartition(-(Qn @ V.T), k - 1, axis=1)[:, :k]
+    found = 0
+    for q, ref in zip(Qn, exact):
+        ids, _ = index.ann.search(V, q, k, nprobe)
+        found += len(np.intersect1d(ids, ref))
+    return found / float(k * len(Qn))
@@ -1,18 +1,31 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Optional
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import closing
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
 import xml.etree.ElementTree as ET
-import httpx
+
+from src.http_client import cached_request, get_client, raise_for_status
+from src.metrics import tracer
 
 ARXIV_API = "https://export.arxiv.org/api/query"
+USER_AGENT = "ArxivPulse/1.0 (Streamlit app)"
+
+# arXiv asks API clients to wait ~3 seconds between consecutive requests.
+ARXIV_DELAY_S = 3.0
 
 NS = {
     "atom": "http://www.w3.org/2005/Atom",
     "arxiv": "http://arxiv.org/schemas/atom",
 }
+_ENTRY = f"{{{NS['atom']}}}entry"
 
-@dataclass
+@dataclass(slots=True)
 class Paper:
     arxiv_id: str
     title: str
@@ -26,65 +39,269 @@ class Paper:
 def _text(el: Optional[ET.Element]) -> str:
     return (el.text or "").strip() if el is not None else ""
 
+def build_query(category: str, keyword_query: str | None = None) -> str:
+    q = f"cat:{category}"
+    if keyword_query and keyword_query.strip():
+        words = [w for w in keyword_query.strip().split() if w]
+        if words:
+            q += " AND " + " AND ".join([f'all:"{w}"' for w in words])
+    return q
+
+def parse_entry(entry: ET.Element) -> Paper:
+    id_url = _text(entry.find("atom:id", NS))
+    arxiv_id = id_url.rsplit("/", 1)[-1]
+
+    title = _text(entry.find("atom:title", NS)).replace("\n", " ")
+    summary = _text(entry.find("atom:summary", NS)).replace("\n", " ")
+    published = _text(entry.find("atom:published", NS))
+    updated = _text(entry.find("atom:updated", NS))
+
+    authors = []
+    for a in entry.findall("atom:author", NS):
+        authors.append(sys.intern(_text(a.find("atom:name", NS))))  # names repeat across papers
+
+    abs_url = id_url
+    pdf_url = ""
+    for link in entry.findall("atom:link", NS):
+        if link.attrib.get("title") == "pdf":
+            pdf_url = link.attrib.get("href", "")
+            break
+    if not pdf_url and abs_url:
+        pdf_url = abs_url.replace("/abs/", "/pdf/") + ".pdf"
+
+    return Paper(
+        arxiv_id=arxiv_id,
+        title=title,
+        summary=summary,
+        published=published,
+        updated=updated,
+        authors=authors,
+        abs_url=abs_url,
+        pdf_url=pdf_url,
+    )
+
+def iter_feed(chunks: Iterable[bytes]) -> Iterator[Paper]:
+    """Incrementally parse an Atom feed, yielding each entry as soon as it closes."""
+    parser = ET.XMLPullParser(events=("end",))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, el in parser.read_events():
+            if el.tag == _ENTRY:
+                yield parse_entry(el)
+                el.clear()
+    parser.close()
+    for _, el in parser.read_events():
+        if el.tag == _ENTRY:
+            yield parse_entry(el)
+
+def _timed_feed(chunks: Iterable[bytes], fetch_s: float = 0.0, **attrs: object) -> Iterator[Paper]:
+    """iter_feed that records time blocked on the network ("arxiv.fetch", plus `fetch_s` spent
+    before parsing began) separately from parse time ("arxiv.parse"); time the consumer spends
+    between entries counts for neither."""
+    net = 0.0
+
+    def timed_chunks() -> Iterator[bytes]:
+        nonlocal net
+        it = iter(chunks)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                chunk = next(it)
+            except StopIteration:
+                return
+            finally:
+                net += time.perf_counter() - t0
+            yield chunk
+
+    feed = iter_feed(timed_chunks())
+    busy, n, size = 0.0, 0, 0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            try:
+                paper = next(feed)
+            except StopIteration:
+                return
+            finally:
+                busy += time.perf_counter() - t0
+            n += 1
+            yield paper
+    finally:
+        tracer.record("arxiv.fetch", fetch_s + net, **attrs)
+        tracer.record("arxiv.parse", max(0.0, busy - net), entries=n)
+
+_throttle_lock = threading.Lock()
+_last_request = 0.0
+
+def _throttle(delay_s: float) -> None:
+    global _last_request
+    with _throttle_lock:
+        wait = _last_request + delay_s - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request = time.monotonic()
+
+def iter_papers(
+    *,
+    category: str,
+    keyword_query: str | None = None,
+    max_results: int | None = None,
+    page_size: int = 100,
+    sort_by: str = "submittedDate",
+    delay_s: float = ARXIV_DELAY_S,
+    timeout_s: float = 25.0,
+    cache_ttl_s: float = 0.0,
+) -> Iterator[Paper]:
+    """Page through arXiv results newest-first, streaming and parsing each page.
+
+    With cache_ttl_s > 0 each page is buffered through the shared response cache instead,
+    so repeated identical queries skip the network (and the rate-limit wait).
+    """
+    q = build_query(category, keyword_query)
+    headers = {"User-Agent": USER_AGENT}
+    client = get_client()
+    seen = 0
+    while max_results is None or seen < max_results:
+        n = page_size if max_results is None else min(page_size, max_results - seen)
+        params = {
+            "search_query": q,
+            "start": seen,
+            "max_results": int(n),
+            "sortBy": sort_by,
+            "sortOrder": "descending",
+        }
+        got = 0
+        if cache_ttl_s > 0:
+            t0 = time.perf_counter()
+            r = cached_request(
+                "GET", ARXIV_API, params=params, headers=headers, timeout_s=timeout_s,
+                ttl_s=cache_ttl_s, before_send=lambda: _throttle(delay_s),
+            )
+            raise_for_status(r, ARXIV_API)
+            fetch_s = time.perf_counter() - t0
+            for paper in _timed_feed([r.content], fetch_s, start=seen, bytes=len(r.content), from_cache=r.from_cache):
+                got += 1
+                yield paper
+        else:
+            _throttle(delay_s)
+            with client.stream("GET", ARXIV_API, params=params, headers=headers, timeout=timeout_s) as resp:
+                resp.raise_for_status()
+                for paper in _timed_feed(resp.iter_bytes(), start=seen):
+                    got += 1
+                    yield paper
+        seen += got
+        if got < n:
+            break
+
 def fetch_papers(
     *,
     category: str,
     max_results: int = 20,
     keyword_query: str | None = None,
     timeout_s: float = 25.0,
+    cache_ttl_s: float = 600.0,
 ) -> List[Paper]:
-    q = f"cat:{category}"
-    if keyword_query and keyword_query.strip():
-        words = [w for w in keyword_query.strip().split() if w]
-        if words:
-            q += " AND " + " AND ".join([f'all:"{w}"' for w in words])
+    return list(iter_papers(
+        category=category,
+        keyword_query=keyword_query,
+        max_results=int(max_results),
+        page_size=int(max_results),
+        timeout_s=timeout_s,
+        cache_ttl_s=cache_ttl_s,
+    ))
+
+class SyncState:
+    """Per-query high-water marks (latest `updated` timestamp plus ids seen at it), kept in a JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, object]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
 
-    params = {
-        "search_query": q,
-        "start": 0,
-        "max_results": int(max_results),
-        "sortBy": "submittedDate",
-        "sortOrder": "descending",
-    }
-
-    with httpx.Client(timeout=timeout_s, headers={"User-Agent": "ArxivPulse/1.0 (Streamlit app)"}) as client:
-        r = client.get(ARXIV_API, params=params)
-        r.raise_for_status()
-
-    root = ET.fromstring(r.text)
-
-    papers: List[Paper] = []
-    for entry in root.findall("atom:entry", NS):
-        id_url = _text(entry.find("atom:id", NS))
-        arxiv_id = id_url.rsplit("/", 1)[-1]
-
-        title = _text(entry.find("atom:title", NS)).replace("\n", " ")
-        summary = _text(entry.find("atom:summary", NS)).replace("\n", " ")
-        published = _text(entry.find("atom:published", NS))
-        updated = _text(entry.find("atom:updated", NS))
-
-        authors = []
-        for a in entry.findall("atom:author", NS):
-            authors.append(_text(a.find("atom:name", NS)))
-
-        abs_url = id_url
-        pdf_url = ""
-        for link in entry.findall("atom:link", NS):
-            if link.attrib.get("title") == "pdf":
-                pdf_url = link.attrib.get("href", "")
+    def get(self, key: str) -> Dict[str, object]:
+        with self._lock:
+            return self._load().get(key, {})
+
+    def set(self, key: str, updated: str, ids: List[str]) -> None:
+        with self._lock:
+            data = self._load()
+            data[key] = {"updated": updated, "ids": ids}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+
+def sync_papers(
+    state: SyncState,
+    *,
+    category: str,
+    keyword_query: str | None = None,
+    max_results: int = 1000,
+    page_size: int = 100,
+    delay_s: float = ARXIV_DELAY_S,
+    commit: Callable[[str, List[str]], None] | None = None,
+) -> Iterator[Paper]:
+    """Yield only papers new or updated since the last completed sync of this query.
+
+    Results are ordered by lastUpdatedDate, so paging stops at the first entry at or below the
+    stored mark. The mark only advances once the generator is fully consumed, and only if paging
+    got back to the old mark (or the feed ran out): when more than `max_results` papers changed,
+    the older ones were never seen, so the mark stays put and the next sync starts over from the
+    newest entries. A truncated sync therefore yields exactly `max_results` papers; callers that
+    need the gap filled should refetch. The first sync of a query (no mark yet) sets the mark.
+
+    With `commit`, the new mark (updated, ids) is handed to it instead of being written to
+    `state`, so callers can store it only once the synced papers are safely persisted.
+    """
+    key = build_query(category, keyword_query)
+    hwm = state.get(key)
+    mark = str(hwm.get("updated", ""))
+    seen_at_mark = set(hwm.get("ids", []))  # type: ignore[arg-type]
+
+    new_mark, new_ids = mark, list(seen_at_mark)
+    reached, consumed = False, 0
+    pages = iter_papers(
+        category=category,
+        keyword_query=keyword_query,
+        max_results=max_results,
+        page_size=page_size,
+        sort_by="lastUpdatedDate",
+        delay_s=delay_s,
+    )
+    with closing(pages):
+        for p in pages:
+            consumed += 1
+            if mark and p.updated < mark:
+                reached = True
                 break
-        if not pdf_url and abs_url:
-            pdf_url = abs_url.replace("/abs/", "/pdf/") + ".pdf"
-
-        papers.append(Paper(
-            arxiv_id=arxiv_id,
-            title=title,
-            summary=summary,
-            published=published,
-            updated=updated,
-            authors=authors,
-            abs_url=abs_url,
-            pdf_url=pdf_url,
-        ))
-
-    return papers
+            if p.updated == mark and p.arxiv_id in seen_at_mark:
+                reached = True
+                continue
+            if p.updated > new_mark:
+                new_mark, new_ids = p.updated, [p.arxiv_id]
+            elif p.updated == new_mark:
+                new_ids.append(p.arxiv_id)
+            yield p
+    if reached or consumed < max_results or not mark:
+        if commit is not None:
+            commit(new_mark, new_ids)
+        else:
+            state.set(key, new_mark, new_ids)
+
+def save_papers(papers: Sequence[Paper], path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump([asdict(p) for p in papers], f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def load_papers(path: str) -> List[Paper]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [Paper(**d) for d in json.load(f)]
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.arxiv import Paper
+from src.embeddings import approx_tokens
+from src.llm import StreamStats, cached_stream_chat, collect
+from src.prompts import BRIEF_MAP_USER, BRIEF_MERGE_USER, BRIEF_REDUCE_USER, BRIEF_SYSTEM, BRIEF_USER
+
+_CITE = re.compile(r"\[P(\d+)\]")
+
+def make_paper_list(papers: Sequence[Paper]) -> str:
+    return "\n".join([f"[P{i}] {p.title} — {p.abs_url}" for i,p in enumerate(papers, start=1)])
+
+def make_abstract_block(papers: Sequence[Paper]) -> str:
+    blocks = []
+    for i, p in enumerate(papers, start=1):
+        blocks.append(f"[P{i}] {p.title}\n{p.summary}")
+    return "\n\n".join(blocks)
+
+def briefing_messages(papers: Sequence[Paper]) -> List[Dict[str, str]]:
+    paper_list = make_paper_list(papers)
+    abstracts = make_abstract_block(papers)
+    prompt = BRIEF_USER.format(paper_list=paper_list, abstracts=abstracts)
+    return [
+        {"role":"system","content":BRIEF_SYSTEM},
+        {"role":"user","content":prompt},
+    ]
+
+def batch_papers(
+    papers: Sequence[Paper],
+    *,
+    budget_tokens: int,
+    labels: Optional[Sequence[int]] = None,
+) -> List[List[Tuple[int, Paper]]]:
+    """Split papers into batches of at most ~budget_tokens of abstract text, keeping global P# numbers.
+    With topic `labels`, papers of one topic are kept together so each map call sees related work."""
+    items = list(enumerate(papers, start=1))
+    if labels is not None:
+        items.sort(key=lambda it: (labels[it[0] - 1], it[0]))
+    batches: List[List[Tuple[int, Paper]]] = []
+    cur: List[Tuple[int, Paper]] = []
+    tok = 0
+    prev_label = None
+    for i, p in items:
+        n = approx_tokens(p.title) + approx_tokens(p.summary) + 4
+        label = labels[i - 1] if labels is not None else None
+        split_topic = labels is not None and cur and label != prev_label and tok >= budget_tokens // 2
+        if cur and (tok + n > budget_tokens or split_topic):
+            batches.append(cur)
+            cur, tok = [], 0
+        cur.append((i, p))
+        tok += n
+        prev_label = label
+    if cur:
+        batches.append(cur)
+    return batches
+
+def _complete(openai_client, cache, chat_model: str, template: str, prompt: str, max_tokens: int) -> str:
+    messages = [{"role":"system","content":BRIEF_SYSTEM}, {"role":"user","content":prompt}]
+    return collect(cached_stream_chat(
+        openai_client, cache, template=template, model=chat_model, messages=messages,
+        temperature=0.25, max_tokens=max_tokens,
+    ))
+
+def map_reduce_briefing(
+    openai_client,
+    chat_model: str,
+    papers: Sequence[Paper],
+    on_text=None,
+    stats: StreamStats | None = None,
+    cache=None,
+    *,
+    batch_tokens: int = 4000,
+    notes_tokens: int = 450,
+    max_workers: int = 8,
+    labels: Optional[Sequence[int]] = None,
+) -> str:
+    batches = batch_papers(papers, budget_tokens=batch_tokens, labels=labels)
+    map_prompts = [
+        BRIEF_MAP_USER.format(abstracts="\n\n".join(f"[P{i}] {p.title}\n{p.summary}" for i, p in b))
+        for b in batches
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(map_prompts)))) as pool:
+        notes = list(pool.map(
+            lambda pr: _complete(openai_client, cache, chat_model, BRIEF_MAP_USER, pr, notes_tokens), map_prompts
+        ))
+
+        # Merge notes in parallel groups until they fit one reduce prompt, so reduce input stays bounded.
+        while sum(approx_tokens(n) for n in notes) > batch_tokens and len(notes) > 1:
+            groups: List[List[str]] = [[]]
+            tok = 0
+            for n in notes:
+                t = approx_tokens(n)
+                if groups[-1] and tok + t > batch_tokens:
+                    groups.append([])
+                    tok = 0
+                groups[-1].append(n)
+                tok += t
+            if len(groups) == len(notes):
+                groups = [notes[i:i+2] for i in range(0, len(notes), 2)]
+            notes = list(pool.map(
+                lambda g: _complete(openai_client, cache, chat_model, BRIEF_MERGE_USER,
+                                    BRIEF_MERGE_USER.format(notes="\n\n---\n\n".join(g)), notes_tokens),
+                groups,
+            ))
+
+    cited = sorted({int(m) for n in notes for m in _CITE.findall(n) if 1 <= int(m) <= len(papers)})
+    paper_list = "\n".join(f"[P{i}] {papers[i-1].title} — {papers[i-1].abs_url}" for i in cited)
+    prompt = BRIEF_REDUCE_USER.format(paper_list=paper_list, notes="\n\n---\n\n".join(notes))
+    deltas = cached_stream_chat(
+        openai_client,
+        cache,
+        template=BRIEF_REDUCE_USER,
+        model=chat_model,
+        messages=[
+            {"role":"system","content":BRIEF_SYSTEM},
+            {"role":"user","content":prompt},
+        ],
+        temperature=0.25,
+        max_tokens=1200,
+        stats=stats,
+    )
+    return collect(deltas, on_text)
+
+def needs_map_reduce(papers: Sequence[Paper], single_shot_tokens: int = 16_000) -> bool:
+    return approx_tokens(make_abstract_block(papers)) > single_shot_tokens
+
+def generate_briefing(
+    openai_client,
+    chat_model: str,
+    papers: Sequence[Paper],
+    on_text=None,
+    stats: StreamStats | None = None,
+    cache=None,
+    *,
+    single_shot_tokens: int = 16_000,
+    labels: Optional[Sequence[int]] = None,
+) -> str:
+    """One prompt while the abstracts fit `single_shot_tokens`; map-reduce over batches beyond that."""
+    if needs_map_reduce(papers, single_shot_tokens):
+        return map_reduce_briefing(openai_client, chat_model, papers, on_text, stats, cache, labels=labels)
+    deltas = cached_stream_chat(
+        openai_client,
+        cache,
+        template=BRIEF_USER,
+        model=chat_model,
+        messages=briefing_messages(papers),
+        temperature=0.25,
+        max_tokens=1200,
+        stats=stats,
+    )
+    return collect(deltas, on_text)
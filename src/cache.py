@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional, Protocol, Sequence
+
+from src.utils import stable_hash
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy is imported where vectors are read or written: the app opens these caches on first
+# render, before anything has been embedded.
+
+def _connect(path: str) -> sqlite3.Connection:
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+# Embedding cache backends. Keys are stable_hash(model + "::" + text), values are float32 vectors.
+
+class EmbeddingCache(Protocol):
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]: ...
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None: ...
+    def __len__(self) -> int: ...
+
+class MemoryEmbeddingCache:
+    def __init__(self, max_entries: int = 50_000):
+        self.max_entries = int(max_entries)
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        out: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for k in keys:
+                v = self._data.get(k)
+                if v is not None:
+                    self._data.move_to_end(k)
+                    out[k] = v
+        return out
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        import numpy as np
+
+        with self._lock:
+            for k, v in items.items():
+                self._data[k] = np.asarray(v, dtype=np.float32)
+                self._data.move_to_end(k)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class SQLiteEmbeddingCache:
+    """LRU embedding store on local disk, safe to share between threads and processes."""
+
+    _BATCH = 500
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        self._conn = _connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb ("
+            "key TEXT PRIMARY KEY, dim INTEGER NOT NULL, vec BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS emb_last_used ON emb(last_used)")
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        import numpy as np
+
+        out: Dict[str, np.ndarray] = {}
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), self._BATCH):
+                batch = keys[i:i+self._BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(f"SELECT key, vec FROM emb WHERE key IN ({marks})", batch).fetchall()
+                for k, blob in rows:
+                    out[k] = np.frombuffer(blob, dtype=np.float32)
+                if rows:
+                    self._conn.executemany("UPDATE emb SET last_used=? WHERE key=?", [(now, k) for k, _ in rows])
+        return out
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        if not items:
+            return
+        import numpy as np
+
+        now = time.time()
+        rows = []
+        for k, v in items.items():
+            arr = np.asarray(v, dtype=np.float32)
+            rows.append((k, int(arr.shape[0]), arr.tobytes(), now))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO emb(key, dim, vec, last_used) VALUES (?,?,?,?)", rows)
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        n = self._conn.execute("SELECT COUNT(*) FROM emb").fetchone()[0]
+        extra = n - self.max_entries
+        if extra > 0:
+            self._conn.execute(
+                "DELETE FROM emb WHERE key IN (SELECT key FROM emb ORDER BY last_used ASC LIMIT ?)", (extra,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM emb").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+def make_embedding_cache(backend: str = "sqlite", *, path: str = "", max_entries: int = 200_000) -> EmbeddingCache:
+    backend = (backend or "sqlite").strip().lower()
+    if backend == "memory":
+        return MemoryEmbeddingCache(max_entries=max_entries)
+    if backend == "sqlite":
+        return SQLiteEmbeddingCache(path or os.path.join(".cache", "embeddings.sqlite3"), max_entries=max_entries)
+    raise ValueError(f"Unknown embedding cache backend: {backend!r} (expected 'sqlite' or 'memory')")
+
+class CompletionCache:
+    """Content-addressed LLM completion store on local disk with TTL and size-bounded LRU eviction.
+    Separate `table`s in one file are independent caches (own entries, size cap and counters)."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        ttl_s: float = 86_400.0,
+        max_bytes: int = 256 << 20,
+        max_entries: int = 50_000,
+        table: str = "llm",
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self.ttl_s = float(ttl_s)
+        self.max_bytes = int(max_bytes)
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = _connect(path)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table}(last_used)")
+
+    @staticmethod
+    def make_key(*, model: str, template: str, messages: Sequence[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        payload = json.dumps(
+            {
+                "model": model,
+                "template": stable_hash(template),
+                "messages": list(messages),
+                "temperature": round(float(temperature), 4),
+                "max_tokens": int(max_tokens),
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return stable_hash(payload)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, created FROM {self.table} WHERE key=?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_s:
+                if row is not None:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key=?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET last_used=? WHERE key=?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table}(key, value, size, created, last_used) VALUES (?,?,?,?,?)",
+                    (key, value, size, now, now),
+                )
+                self._conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (now - self.ttl_s,))
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        n, total = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        if n <= self.max_entries and total <= self.max_bytes:
+            return
+        drop, freed = 0, 0
+        for (sz,) in self._conn.execute(f"SELECT size FROM {self.table} ORDER BY last_used ASC"):
+            if n - drop <= self.max_entries and total - freed <= self.max_bytes:
+                break
+            drop += 1
+            freed += sz
+        self._conn.execute(f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY last_used ASC LIMIT ?)", (drop,))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            n, total = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": int(n),
+            "bytes": int(total),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    similarity: float
+
+def normalize_question(q: str) -> str:
+    return " ".join(q.lower().split())
+
+class AnswerCache:
+    """Chat answers on local disk, matched by question embedding. Entries are scoped (see `scope`)
+    to one paper set / index version, model and retrieval mode, so an answer is only reused for
+    the evidence it was grounded in. A question without a vector (lexical retrieval) matches
+    earlier questions with the same normalized text only."""
+
+    def __init__(self, path: str, *, threshold: float = 0.95, ttl_s: float = 86_400.0, max_entries: int = 5_000):
+        self.path = path
+        self.threshold = float(threshold)
+        self.ttl_s = float(ttl_s)
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = _connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "id INTEGER PRIMARY KEY, scope TEXT NOT NULL, question TEXT NOT NULL, norm TEXT NOT NULL, "
+            "vec BLOB, answer TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_scope ON answers(scope)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers(last_used)")
+
+    @staticmethod
+    def scope(version: str, model: str, retrieval: str) -> str:
+        return stable_hash(f"{version}|{model}|{retrieval}")
+
+    def lookup(self, scope: str, question: str, vec: Optional[Sequence[float]] = None) -> Optional[CachedAnswer]:
+        import numpy as np
+
+        now = time.time()
+        norm = normalize_question(question)
+        q = None
+        if vec is not None:
+            q = np.asarray(vec, dtype=np.float32)
+            q = q / (np.linalg.norm(q) + 1e-12)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, question, norm, vec, answer FROM answers WHERE scope=? AND created >= ?",
+                (scope, now - self.ttl_s),
+            ).fetchall()
+            best, best_sim = None, -1.0
+            for row in rows:
+                if row[2] == norm:
+                    best, best_sim = row, 1.0
+                    break
+                if q is None or row[3] is None or len(row[3]) != 4 * q.shape[0]:
+                    continue
+                v = np.frombuffer(row[3], dtype=np.float32)
+                sim = float(v @ q / (np.linalg.norm(v) + 1e-12))
+                if sim > best_sim:
+                    best, best_sim = row, sim
+            if best is None or best_sim < self.threshold:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE answers SET last_used=? WHERE id=?", (now, best[0]))
+            self.hits += 1
+        return CachedAnswer(question=best[1], answer=best[4], similarity=best_sim)
+
+    def put(self, scope: str, question: str, answer: str, vec: Optional[Sequence[float]] = None) -> None:
+        import numpy as np
+
+        now = time.time()
+        blob = np.asarray(vec, dtype=np.float32).tobytes() if vec is not None else None
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO answers(scope, question, norm, vec, answer, created, last_used) VALUES (?,?,?,?,?,?,?)",
+                    (scope, question, normalize_question(question), blob, answer, now, now),
+                )
+                self._conn.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl_s,))
+                extra = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] - self.max_entries
+                if extra > 0:
+                    self._conn.execute(
+                        "DELETE FROM answers WHERE id IN (SELECT id FROM answers ORDER BY last_used ASC LIMIT ?)", (extra,)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            n = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": int(n),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
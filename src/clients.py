@@ -1,10 +1,27 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from openai import OpenAI
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
-@dataclass
 class Clients:
-    openai: OpenAI
+    """API clients, created on first use: importing openai costs more than the rest of app
+    startup, and a session that only browses saved digests never needs it."""
+
+    def __init__(self, openai_api_key: str):
+        self._openai_api_key = openai_api_key
+        self._openai: Optional[OpenAI] = None
+        self._lock = threading.Lock()
+
+    @property
+    def openai(self) -> OpenAI:
+        with self._lock:
+            if self._openai is None:
+                from openai import OpenAI
+
+                self._openai = OpenAI(api_key=self._openai_api_key)
+            return self._openai
 
 def make_clients(openai_api_key: str) -> Clients:
-    return Clients(openai=OpenAI(api_key=openai_api_key))
+    return Clients(openai_api_key)
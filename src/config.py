@@ -2,6 +2,11 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 
+# Sidebar defaults; the worker precomputes digests for exactly these so the app finds them.
+CATEGORIES = ("cs.AI", "cs.CL", "cs.LG", "cs.IR", "cs.CV", "stat.ML")
+DEFAULT_KEYWORDS = "agents tool use multimodal"
+DEFAULT_MAX_RESULTS = 20
+
 @dataclass(frozen=True)
 class Settings:
     openai_api_key: str
@@ -11,6 +16,34 @@ class Settings:
     perplexity_api_key: str | None = None
     pplx_model: str = "sonar-pro"
 
+    emb_cache_backend: str = "sqlite"
+    emb_cache_path: str = ".cache/embeddings.sqlite3"
+    emb_cache_max_entries: int = 200_000
+
+    embed_concurrency: int = 4
+    embed_batch_tokens: int = 60_000
+
+    index_dir: str = ".cache/indexes"
+
+    llm_cache_path: str = ".cache/completions.sqlite3"
+    llm_cache_ttl_s: float = 86_400.0
+    llm_cache_max_mb: int = 256
+
+    shared_views_max_mb: int = 1024
+
+    rerank_candidates: int = 50
+    rerank_model: str = ""
+    rerank_cache_max_mb: int = 16
+    chat_context_tokens: int = 3000
+
+    chat_cache_path: str = ".cache/answers.sqlite3"
+    chat_cache_threshold: float = 0.95
+    chat_cache_ttl_s: float = 86_400.0
+    chat_cache_max_entries: int = 5_000
+
+    metrics_trace_path: str = ""
+    metrics_port: int = 0
+
 def get_settings() -> Settings:
     openai_key = os.getenv("OPENAI_API_KEY", "").strip()
     if not openai_key:
@@ -24,4 +57,24 @@ def get_settings() -> Settings:
         openai_embed_model=os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small").strip(),
         perplexity_api_key=pplx_key,
         pplx_model=os.getenv("PPLX_MODEL", "sonar-pro").strip(),
+        emb_cache_backend=os.getenv("EMB_CACHE_BACKEND", "sqlite").strip(),
+        emb_cache_path=os.getenv("EMB_CACHE_PATH", ".cache/embeddings.sqlite3").strip(),
+        emb_cache_max_entries=int(os.getenv("EMB_CACHE_MAX_ENTRIES", "200000")),
+        embed_concurrency=int(os.getenv("EMBED_CONCURRENCY", "4")),
+        embed_batch_tokens=int(os.getenv("EMBED_BATCH_TOKENS", "60000")),
+        index_dir=os.getenv("INDEX_DIR", ".cache/indexes").strip(),
+        llm_cache_path=os.getenv("LLM_CACHE_PATH", ".cache/completions.sqlite3").strip(),
+        llm_cache_ttl_s=float(os.getenv("LLM_CACHE_TTL_S", "86400")),
+        llm_cache_max_mb=int(os.getenv("LLM_CACHE_MAX_MB", "256")),
+        shared_views_max_mb=int(os.getenv("SHARED_VIEWS_MAX_MB", "1024")),
+        rerank_candidates=int(os.getenv("RERANK_CANDIDATES", "50")),
+        rerank_model=os.getenv("RERANK_MODEL", "").strip(),
+        rerank_cache_max_mb=int(os.getenv("RERANK_CACHE_MAX_MB", "16")),
+        chat_context_tokens=int(os.getenv("CHAT_CONTEXT_TOKENS", "3000")),
+        chat_cache_path=os.getenv("CHAT_CACHE_PATH", ".cache/answers.sqlite3").strip(),
+        chat_cache_threshold=float(os.getenv("CHAT_CACHE_THRESHOLD", "0.95")),
+        chat_cache_ttl_s=float(os.getenv("CHAT_CACHE_TTL_S", "86400")),
+        chat_cache_max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "5000")),
+        metrics_trace_path=os.getenv("METRICS_TRACE_PATH", "").strip(),
+        metrics_port=int(os.getenv("METRICS_PORT", "0")),
     )
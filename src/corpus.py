@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+from src.arxiv import Paper
+from src.embeddings import EmbedOptions, get_or_embed
+from src.paper_store import as_store, attach_store
+from src.rag import VectorIndex, build_index
+
+def paper_records(papers: Sequence[Paper], start: int = 1) -> Tuple[List[str], List[Dict[str, Any]]]:
+    texts, metas = [], []
+    for i, p in enumerate(papers, start=start):
+        text = f"Title: {p.title}\nAbstract: {p.summary}"
+        texts.append(text)
+        metas.append({
+            "pid": f"P{i}",
+            "arxiv_id": p.arxiv_id,
+            "title": p.title,
+            "abs_url": p.abs_url,
+            "pdf_url": p.pdf_url,
+            "published": p.published,
+            "authors": p.authors
+        })
+    return texts, metas
+
+def build_paper_index(openai_client, embed_model: str, papers: Sequence[Paper], cache, opts: EmbedOptions | None = None) -> VectorIndex:
+    texts, metas = paper_records(papers)
+    vecs = get_or_embed(openai_client, embed_model, texts, cache, opts)
+    index = build_index(vecs, metas, texts)
+    attach_store(index, as_store(papers))
+    return index
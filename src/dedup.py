@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+from src.ann import kmeans
+from src.arxiv import Paper
+from src.lexical import tokenize
+
+# Duplicate handling for fetched papers:
+#   1. exact: arXiv versions (2401.01234v1 / v2) and cross-listings collapse on the bare id;
+#   2. near:  MinHash signatures over word shingles, bucketed with LSH banding, so each new paper
+#             is compared only against the few papers sharing a band (no all-pairs pass).
+# Topic clusters are spherical k-means over the abstract embeddings already in the index.
+
+_VERSION = re.compile(r"v(\d+)$")
+_PRIME = 4_294_967_311  # smallest prime above 2**32; a*x + b stays below 2**64 for 31-bit a, b
+
+def canonical_id(arxiv_id: str) -> str:
+    return _VERSION.sub("", (arxiv_id or "").strip())
+
+def version(arxiv_id: str) -> int:
+    m = _VERSION.search(arxiv_id or "")
+    return int(m.group(1)) if m else 0
+
+def shingles(text: str, n: int = 3) -> List[str]:
+    toks = tokenize(text)
+    if len(toks) <= n:
+        return [" ".join(toks)] if toks else []
+    return [" ".join(toks[i:i+n]) for i in range(len(toks) - n + 1)]
+
+class MinHashLSH:
+    """Incremental MinHash + LSH banding. `num_perm` must be divisible by `bands`."""
+
+    def __init__(self, *, threshold: float = 0.8, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        rng = np.random.default_rng(seed)
+        self.threshold = float(threshold)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._buckets: Dict[bytes, List[int]] = {}
+        self._sigs: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of the text's shingles, or None when it has none (nothing to compare)."""
+        sh = shingles(text)
+        if not sh:
+            return None
+        x = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in sh), dtype=np.uint64, count=len(sh))
+        return ((self._a[:, None] * x[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        r = self.rows
+        return [bytes([b]) + sig[b*r:(b+1)*r].tobytes() for b in range(self.bands)]
+
+    def query(self, sig: np.ndarray) -> Optional[int]:
+        """Id of the most similar stored signature with estimated Jaccard >= threshold, if any."""
+        cand = {i for key in self._band_keys(sig) for i in self._buckets.get(key, ())}
+        best, best_sim = None, self.threshold
+        for i in cand:
+            sim = float(np.mean(self._sigs[i] == sig))
+            if sim >= best_sim:
+                best, best_sim = i, sim
+        return best
+
+    def add(self, sig: np.ndarray) -> int:
+        i = len(self._sigs)
+        self._sigs.append(sig)
+        for key in self._band_keys(sig):
+            self._buckets.setdefault(key, []).append(i)
+        return i
+
+class Deduplicator:
+    """Streaming filter: `check(paper)` returns the arXiv id of an already accepted paper that
+    `paper` duplicates, or None after accepting it."""
+
+    def __init__(self, *, threshold: float = 0.8, num_perm: int = 64, bands: int = 16):
+        self.lsh = MinHashLSH(threshold=threshold, num_perm=num_perm, bands=bands)
+        self.kept: List[str] = []  # accepted arxiv_ids, in order
+        self.duplicates: Dict[str, str] = {}  # dropped arxiv_id -> kept arxiv_id
+        self._by_id: Dict[str, int] = {}  # canonical id -> index into kept
+        self._by_row: List[int] = []  # LSH row -> index into kept
+
+    def check(self, paper: Paper) -> Optional[str]:
+        cid = canonical_id(paper.arxiv_id)
+        i = self._by_id.get(cid)
+        if i is None:
+            # Papers with no shingles (empty or one-symbol text) are only matched by id.
+            sig = self.lsh.signature(f"{paper.title} {paper.summary}")
+            row = self.lsh.query(sig) if sig is not None else None
+            if row is None:
+                self._by_id[cid] = len(self.kept)
+                self.kept.append(paper.arxiv_id)
+                if sig is not None:
+                    self.lsh.add(sig)
+                    self._by_row.append(self._by_id[cid])
+                return None
+            i = self._by_row[row]
+        kept = self.kept[i]
+        self.duplicates[paper.arxiv_id] = kept
+        return kept
+
+@dataclass
+class DedupResult:
+    papers: List[Paper]
+    duplicates: Dict[str, str] = field(default_factory=dict)
+
+def dedup_papers(papers: Sequence[Paper], *, threshold: float = 0.8) -> DedupResult:
+    """Collapse versions (keeping the newest, at the position of the first seen) and near-duplicates."""
+    newest: Dict[str, Paper] = {}
+    for p in papers:
+        cid = canonical_id(p.arxiv_id)
+        cur = newest.get(cid)
+        if cur is None or version(p.arxiv_id) > version(cur.arxiv_id):
+            newest[cid] = p
+    dropped: Dict[str, str] = {}
+    for p in papers:
+        keep = newest[canonical_id(p.arxiv_id)]
+        if keep is not p:
+            dropped[p.arxiv_id] = keep.arxiv_id
+    d = Deduplicator(threshold=threshold)
+    kept = [p for p in newest.values() if d.check(p) is None]
+    dropped.update(d.duplicates)
+    return DedupResult(papers=kept, duplicates=dropped)
+
+def default_topics(n: int) -> int:
+    return int(np.clip(round(np.sqrt(n / 2.0)), 2, 12)) if n >= 4 else 1
+
+def topic_clusters(vectors: np.ndarray, k: int | None = None, *, seed: int = 0) -> np.ndarray:
+    """Topic label per row (rows are L2-normalized embeddings, e.g. VectorIndex.vectors)."""
+    n = len(vectors)
+    if n == 0:
+        return np.empty(0, dtype=np.int32)
+    _, assign = kmeans(vectors, k or default_topics(n), iters=25, seed=seed)
+    # Relabel by size (0 = largest topic) so labels are stable across reruns with the same data.
+    sizes = np.bincount(assign)
+    rank = np.empty_like(sizes)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(sizes))
+    return rank[assign].astype(np.int32)
+
+def cluster_terms(texts: Sequence[str], labels: Sequence[int], n: int = 3) -> Dict[int, List[str]]:
+    """A few terms per topic that are frequent inside it and rare outside it."""
+    df: Counter = Counter()
+    per: Dict[int, Counter] = {}
+    sizes: Counter = Counter(int(l) for l in labels)
+    for text, label in zip(texts, labels):
+        toks = set(t for t in tokenize(text) if len(t) > 2 and not t.isdigit())
+        df.update(toks)
+        per.setdefault(int(label), Counter()).update(toks)
+    total = max(1, len(texts))
+    out: Dict[int, List[str]] = {}
+    for label, c in per.items():
+        size = sizes[label]
+        score = {t: (cnt / size) - (df[t] - cnt) / max(1, total - size) for t, cnt in c.items() if cnt > 1 or size == 1}
+        out[label] = [t for t, v in sorted(score.items(), key=lambda kv: -kv[1])[:n] if v > 0]
+    return out
+
+def paper_topics(index, n_papers: int) -> np.ndarray:
+    """Topic labels for the first `n_papers` (abstract) rows of a paper index."""
+    rows = [i for i, m in enumerate(index.metadatas[:n_papers]) if not m.get("section")]
+    if len(rows) != n_papers:
+        return np.zeros(n_papers, dtype=np.int32)
+    return topic_clusters(np.asarray(index.vectors[:n_papers]))
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from src.metrics import tracer
+from src.utils import stable_hash
+
+@dataclass(frozen=True)
+class EmbedOptions:
+    max_workers: int = 4
+    max_batch_tokens: int = 60_000
+    max_batch_items: int = 256
+    max_retries: int = 5
+    base_delay_s: float = 0.5
+    max_delay_s: float = 20.0
+
+def approx_tokens(text: str) -> int:
+    # ~4 chars/token for English prose; good enough to keep requests under the API's token cap.
+    return len(text) // 4 + 1
+
+def plan_batches(texts: List[str], *, max_tokens: int, max_items: int) -> List[Tuple[int, int]]:
+    spans: List[Tuple[int, int]] = []
+    start, tok = 0, 0
+    for i, t in enumerate(texts):
+        n = approx_tokens(t)
+        if i > start and (tok + n > max_tokens or i - start >= max_items):
+            spans.append((start, i))
+            start, tok = i, 0
+        tok += n
+    if start < len(texts):
+        spans.append((start, len(texts)))
+    return spans
+
+def _retry_after(e: Exception) -> Optional[float]:
+    resp = getattr(e, "response", None)
+    headers = getattr(resp, "headers", None) or {}
+    try:
+        v = headers.get("retry-after")
+        return float(v) if v is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _is_retryable(e: Exception) -> bool:
+    status = getattr(e, "status_code", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(e).__name__ in ("APIConnectionError", "APITimeoutError")
+
+def _embed_batch(client, model: str, batch: List[str], opts: EmbedOptions, stop: threading.Event) -> List[List[float]]:
+    attempt = 0
+    while True:
+        try:
+            with tracer.span("openai.embed", model=model, items=len(batch), attempt=attempt) as sp:
+                r = client.embeddings.create(model=model, input=batch)
+                usage = getattr(r, "usage", None)
+                sp["prompt_tokens"] = getattr(usage, "prompt_tokens", None) or sum(approx_tokens(t) for t in batch)
+            return [d.embedding for d in sorted(r.data, key=lambda d: getattr(d, "index", 0))]
+        except Exception as e:
+            attempt += 1
+            if stop.is_set() or attempt > opts.max_retries or not _is_retryable(e):
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(opts.max_delay_s, opts.base_delay_s * (2 ** (attempt - 1)))
+                delay *= 0.5 + random.random()
+            else:
+                delay = min(max(0.0, delay), opts.max_delay_s)  # a huge Retry-After must not stall a worker
+            time.sleep(delay)
+
+def openai_embed(client, model: str, texts: List[str], opts: EmbedOptions | None = None) -> List[List[float]]:
+    opts = opts or EmbedOptions()
+    spans = plan_batches(texts, max_tokens=opts.max_batch_tokens, max_items=opts.max_batch_items)
+    if len(spans) <= 1 or opts.max_workers <= 1:
+        stop = threading.Event()
+        return [v for a, b in spans for v in _embed_batch(client, model, texts[a:b], opts, stop)]
+
+    out: List[Any] = [None] * len(texts)
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=min(opts.max_workers, len(spans)), thread_name_prefix="embed") as pool:
+        futs = [(a, b, pool.submit(_embed_batch, client, model, texts[a:b], opts, stop)) for a, b in spans]
+        try:
+            for a, b, f in futs:
+                out[a:b] = f.result()
+        except BaseException:
+            stop.set()
+            for _, _, f in futs:
+                f.cancel()
+            raise
+    return out
+
+def get_or_embed(client, model: str, texts: List[str], cache, opts: EmbedOptions | None = None) -> List[List[float]]:
+    """Embed `texts`, serving repeats from `cache` (keyed by stable_hash(model + '::' + text))."""
+    hashes = [stable_hash(model + "::" + t) for t in texts]
+    with tracer.span("embed.cache_get", items=len(hashes)) as sp:
+        hit = cache.get_many(hashes)
+        sp["hits"] = len(hit)
+    vecs: List[Any] = [hit.get(h) for h in hashes]
+    missing, missing_meta = [], []
+    for i,(t,h) in enumerate(zip(texts, hashes)):
+        if vecs[i] is None:
+            missing.append(t)
+            missing_meta.append((i,h))
+    if missing:
+        new = openai_embed(client, model, missing, opts)
+        for (i,h),v in zip(missing_meta, new):
+            vecs[i] = v
+        with tracer.span("embed.cache_put", items=len(new)):
+            cache.put_many({h: v for (_,h),v in zip(missing_meta, new)})
+    return vecs
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import io
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from src.arxiv import USER_AGENT, Paper
+from src.http_client import get_client
+from src.metrics import tracer
+
+# Full-text ingestion: download PDFs (bounded concurrency), extract text, split into
+# section-aware overlapping chunks, and append them to a VectorIndex in bounded batches.
+
+@dataclass(frozen=True)
+class ChunkOptions:
+    chunk_words: int = 220
+    overlap_words: int = 40
+    max_chunks_per_paper: int = 40
+    max_pages: int = 30
+    max_pdf_bytes: int = 20 << 20
+
+@dataclass
+class Chunk:
+    pid: str
+    paper: Paper
+    section: str
+    ordinal: int
+    text: str
+
+_KNOWN = (
+    r"abstract|introduction|related work|background|preliminaries|method(?:s|ology)?|approach|"
+    r"model|experiments?(?: setup)?|results|evaluation|discussion|analysis|limitations|"
+    r"conclusions?(?: and future work)?|future work|appendix|references|bibliography|acknowledge?ments?"
+)
+_HEADING = re.compile(
+    rf"^(?:(?P<num>\d+(?:\.\d+)*\.?|[IVX]+\.|[A-H]\.)\s+)?(?P<name>(?:{_KNOWN})\b.*|[A-Z][A-Za-z\- ,:&]{{2,60}})$"
+)
+_STOP = re.compile(r"^(?:\d+\.?\s+)?(references|bibliography)\s*$", re.I)
+
+def download_pdf(url: str, *, timeout_s: float = 45.0, max_bytes: int = 20 << 20) -> bytes:
+    buf = bytearray()
+    with tracer.span("pdf.download") as sp:
+        with get_client().stream("GET", url, headers={"User-Agent": USER_AGENT}, timeout=timeout_s) as r:
+            r.raise_for_status()
+            for part in r.iter_bytes():
+                buf.extend(part)
+                if len(buf) > max_bytes:
+                    raise ValueError(f"PDF larger than {max_bytes} bytes: {url}")
+        sp["bytes"] = len(buf)
+    return bytes(buf)
+
+def extract_text(pdf: bytes, *, max_pages: int = 30) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise RuntimeError("Full-text indexing needs pypdf (pip install pypdf).") from e
+    with tracer.span("pdf.extract", bytes=len(pdf)) as sp:
+        reader = PdfReader(io.BytesIO(pdf))
+        pages = []
+        for page in reader.pages[:max_pages]:
+            pages.append(page.extract_text() or "")
+        sp["pages"] = len(pages)
+    return "\n".join(pages)
+
+def _is_heading(line: str) -> bool:
+    if len(line) > 80 or line.endswith((".", ",", ";")):
+        return False
+    m = _HEADING.match(line)
+    if not m:
+        return False
+    # Bare capitalised lines are only headings when numbered; known section names may stand alone.
+    return bool(m.group("num")) or bool(re.match(rf"(?:{_KNOWN})\b", m.group("name"), re.I))
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    sections: List[Tuple[str, List[str]]] = [("Front matter", [])]
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if _STOP.match(line):
+            break
+        if _is_heading(line):
+            sections.append((line, []))
+        else:
+            sections[-1][1].append(line)
+    return [(name, " ".join(lines)) for name, lines in sections if lines]
+
+def chunk_sections(sections: Iterable[Tuple[str, str]], opts: ChunkOptions) -> Iterator[Tuple[str, str]]:
+    step = max(1, opts.chunk_words - opts.overlap_words)
+    for name, body in sections:
+        words = body.split()
+        for s in range(0, len(words), step):
+            yield name, " ".join(words[s:s + opts.chunk_words])
+            if s + opts.chunk_words >= len(words):
+                break
+
+def paper_chunks(pid: str, paper: Paper, opts: ChunkOptions) -> List[Chunk]:
+    pdf = download_pdf(paper.pdf_url, max_bytes=opts.max_pdf_bytes)
+    text = extract_text(pdf, max_pages=opts.max_pages)
+    del pdf
+    # Title/abstract are already indexed from the arXiv metadata.
+    sections = [(n, b) for n, b in split_sections(text) if n != "Front matter" and not n.lower().startswith("abstract")]
+    out: List[Chunk] = []
+    for section, body in chunk_sections(sections, opts):
+        if len(out) >= opts.max_chunks_per_paper:
+            break
+        out.append(Chunk(pid=pid, paper=paper, section=section, ordinal=len(out) + 1, text=body))
+    return out
+
+def iter_chunks(
+    papers: Sequence[Paper],
+    *,
+    opts: ChunkOptions | None = None,
+    max_workers: int = 4,
+    errors: List[Tuple[str, str]] | None = None,
+) -> Iterator[Chunk]:
+    """Yield chunks paper by paper as downloads finish, with at most `max_workers` PDFs in flight."""
+    opts = opts or ChunkOptions()
+    todo = [(f"P{i}", p) for i, p in enumerate(papers, start=1) if p.pdf_url]
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf") as pool:
+        pending: Dict[Future, str] = {}
+        it = iter(todo)
+
+        def _fill() -> None:
+            while len(pending) < max_workers:
+                nxt = next(it, None)
+                if nxt is None:
+                    return
+                pending[pool.submit(paper_chunks, nxt[0], nxt[1], opts)] = nxt[0]
+
+        _fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                pid = pending.pop(f)
+                try:
+                    chunks = f.result()
+                except Exception as e:
+                    if errors is not None:
+                        errors.append((pid, str(e)))
+                    continue
+                yield from chunks
+            _fill()
+
+def chunk_meta(c: Chunk) -> Dict[str, Any]:
+    p = c.paper
+    return {
+        "pid": c.pid,
+        "arxiv_id": p.arxiv_id,
+        "title": p.title,
+        "abs_url": p.abs_url,
+        "pdf_url": p.pdf_url,
+        "published": p.published,
+        "section": c.section,
+        "chunk": c.ordinal,
+    }
+
+def index_fulltext(
+    index,
+    papers: Sequence[Paper],
+    embed: Callable[[List[str]], List[List[float]]],
+    *,
+    opts: ChunkOptions | None = None,
+    max_workers: int = 4,
+    batch_size: int = 128,
+) -> Tuple[int, List[Tuple[str, str]]]:
+    """Append full-text chunks of `papers` to `index`. Returns (chunks added, [(pid, error)])."""
+    errors: List[Tuple[str, str]] = []
+    batch: List[Chunk] = []
+    added = 0
+
+    def _flush() -> None:
+        nonlocal added
+        texts = [f"{c.paper.title} — {c.section}\n{c.text}" for c in batch]
+        index.add(embed(texts), [chunk_meta(c) for c in batch], [c.text for c in batch])
+        added += len(batch)
+        batch.clear()
+
+    for c in iter_chunks(papers, opts=opts, max_workers=max_workers, errors=errors):
+        batch.append(c)
+        if len(batch) >= batch_size:
+            _flush()
+    if batch:
+        _flush()
+    return added, errors
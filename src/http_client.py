@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Mapping, Optional
+
+from src.utils import stable_hash
+
+if TYPE_CHECKING:
+    import httpx
+
+# One pooled, keep-alive httpx.Client per process plus a small TTL response cache. httpx is
+# imported on the first request, so importing this module (and src.arxiv) stays cheap at startup.
+
+_client: Optional[httpx.Client] = None
+_client_pid = 0
+_client_lock = threading.Lock()
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def get_client() -> httpx.Client:
+    import httpx
+
+    global _client, _client_pid
+    with _client_lock:
+        # A client inherited across fork() shares sockets with the parent; make a fresh one.
+        if _client is None or _client_pid != os.getpid():
+            _client = httpx.Client(
+                http2=_http2_available(),
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120.0),
+                timeout=30.0,
+                follow_redirects=True,
+            )
+            _client_pid = os.getpid()
+        return _client
+
+def set_client(client: httpx.Client) -> None:
+    """Install `client` as this process's shared client (e.g. one with a custom transport)."""
+    global _client, _client_pid
+    with _client_lock:
+        _client = client
+        _client_pid = os.getpid()
+
+def close_client() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    content: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    expires_at: float = 0.0
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            r = self._data.get(key)
+            if r is not None:
+                self._data.move_to_end(key)
+            return r
+
+    def put(self, key: str, resp: CachedResponse) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.content)
+            self._data[key] = resp
+            self._bytes += len(resp.content)
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, ev = self._data.popitem(last=False)
+                self._bytes -= len(ev.content)
+
+    def count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+response_cache = ResponseCache()
+
+def _norm(v: Any) -> str:
+    return " ".join(str(v).split())
+
+def cache_key(method: str, url: str, params: Optional[Mapping[str, Any]] = None, body: Any = None, vary: str = "") -> str:
+    p = sorted((str(k), _norm(v)) for k, v in (params or {}).items())
+    b = json.dumps(body, sort_keys=True, separators=(",", ":")) if body is not None else ""
+    return stable_hash(json.dumps([method.upper(), url, p, b, vary]))
+
+def _validators(r: httpx.Response) -> Dict[str, str]:
+    return {k: r.headers[k] for k in ("etag", "last-modified") if k in r.headers}
+
+def cached_request(
+    method: str,
+    url: str,
+    *,
+    params: Optional[Mapping[str, Any]] = None,
+    json_body: Any = None,
+    headers: Optional[Mapping[str, str]] = None,
+    timeout_s: float = 30.0,
+    ttl_s: float = 0.0,
+    vary: str = "",
+    cache: ResponseCache = response_cache,
+    before_send: Optional[Callable[[], None]] = None,
+) -> CachedResponse:
+    """Send a request through the shared client; 2xx responses are reused for `ttl_s` seconds.
+
+    Expired entries that carried an ETag/Last-Modified are revalidated with a conditional
+    request and refreshed on 304. `vary` partitions the cache (e.g. a hash of the API key).
+    """
+    key = cache_key(method, url, params, json_body, vary) if ttl_s > 0 else ""
+    stale: Optional[CachedResponse] = cache.get(key) if key else None
+    now = time.time()
+    if stale is not None and stale.expires_at > now:
+        cache.count(hit=True)
+        return CachedResponse(stale.status_code, stale.content, stale.headers, stale.expires_at, from_cache=True)
+    if key:
+        cache.count(hit=False)
+
+    h = dict(headers or {})
+    if stale is not None:
+        if "etag" in stale.headers:
+            h["If-None-Match"] = stale.headers["etag"]
+        if "last-modified" in stale.headers:
+            h["If-Modified-Since"] = stale.headers["last-modified"]
+
+    if before_send is not None:
+        before_send()
+    r = get_client().request(method, url, params=params, json=json_body, headers=h, timeout=timeout_s)
+    if r.status_code == 304 and stale is not None:
+        fresh = CachedResponse(stale.status_code, stale.content, stale.headers, time.time() + ttl_s, from_cache=True)
+        cache.put(key, fresh)
+        return fresh
+
+    out = CachedResponse(r.status_code, r.content, _validators(r), time.time() + ttl_s)
+    if key and 200 <= r.status_code < 300:
+        cache.put(key, out)
+    return out
+
+def raise_for_status(resp: CachedResponse, url: str) -> None:
+    if resp.status_code >= 400:
+        import httpx
+
+        req = httpx.Request("GET", url)
+        raise httpx.HTTPStatusError(
+            f"HTTP {resp.status_code} for {url}",
+            request=req,
+            response=httpx.Response(resp.status_code, content=resp.content, request=req),
+        )
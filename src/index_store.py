@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import uuid
+from dataclasses import asdict
+from typing import Any, Dict, Iterator, List, Sequence
+import numpy as np
+
+from src.ann import IVFIndex, IVFParams
+from src.rag import VectorIndex
+
+# On-disk layout of a saved VectorIndex (one directory):
+#   manifest.json   format version, row count, dim, metadata column names, IVF params
+#   vectors.f32     raw row-major float32 matrix (n x dim), already L2-normalized
+#   texts.bin       UTF-8 texts concatenated; texts.off holds n+1 int64 byte offsets
+#   metas.json      metadata stored column-wise: {"pid": [...], "title": [...], ...}
+#   ivf_*.npy       optional IVF centroids / assignments / int8 codes
+# Vectors and texts are np.memmap-ed read-only on load, so every process on the host
+# shares the same page-cache pages and nothing is decoded until it is touched.
+
+FORMAT_VERSION = 1
+
+class TextColumn(Sequence[str]):
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = blob
+        self._off = offsets
+
+    def __len__(self) -> int:
+        return len(self._off) - 1
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return bytes(self._blob[self._off[i]:self._off[i+1]]).decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(len(self)))
+
+class MetaColumns(Sequence[Dict[str, Any]]):
+    def __init__(self, columns: Dict[str, List[Any]], n: int):
+        self._cols = columns
+        self._n = n
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return {k: v[i] for k, v in self._cols.items() if v[i] is not None}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self[i] for i in range(self._n))
+
+def _columns(metas: Sequence[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    keys: List[str] = []
+    for m in metas:
+        for k in m:
+            if k not in keys:
+                keys.append(k)
+    return {k: [m.get(k) for m in metas] for k in keys}
+
+def save_index(index: VectorIndex, path: str) -> None:
+    """Write `index` to directory `path`, replacing any previous save atomically."""
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = os.path.join(parent, f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+    os.makedirs(tmp)
+    try:
+        n, dim = len(index), index.dim
+        np.ascontiguousarray(index.vectors, dtype=np.float32).tofile(os.path.join(tmp, "vectors.f32"))
+
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        with open(os.path.join(tmp, "texts.bin"), "wb") as f:
+            for i, t in enumerate(index.texts):
+                b = t.encode("utf-8")
+                f.write(b)
+                offsets[i + 1] = offsets[i] + len(b)
+        offsets.tofile(os.path.join(tmp, "texts.off"))
+
+        cols = _columns(index.metadatas)
+        with open(os.path.join(tmp, "metas.json"), "w", encoding="utf-8") as f:
+            json.dump(cols, f, ensure_ascii=False, separators=(",", ":"))
+
+        manifest: Dict[str, Any] = {"format": FORMAT_VERSION, "n": n, "dim": dim, "meta_columns": list(cols)}
+        if index.ann is not None:
+            ann = index.ann
+            np.save(os.path.join(tmp, "ivf_centroids.npy"), ann.centroids)
+            np.save(os.path.join(tmp, "ivf_assign.npy"), ann.assign)
+            if ann.codes is not None:
+                np.save(os.path.join(tmp, "ivf_codes.npy"), ann.codes)
+                np.save(os.path.join(tmp, "ivf_scales.npy"), ann.scales)
+            manifest["ivf"] = asdict(ann.params)
+        with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap directories; readers holding maps of the old files keep working (POSIX unlink semantics).
+        old = None
+        if os.path.exists(path):
+            old = tmp + ".old"
+            os.replace(path, old)
+        os.replace(tmp, path)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+def load_index(path: str, *, mmap: bool = True) -> VectorIndex:
+    with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported index format {manifest.get('format')!r} in {path}")
+    n, dim = int(manifest["n"]), int(manifest["dim"])
+
+    def _raw(name: str, dtype, shape):
+        p = os.path.join(path, name)
+        if not shape[0] or os.path.getsize(p) == 0:
+            return np.zeros(shape, dtype=dtype)
+        if mmap:
+            return np.memmap(p, dtype=dtype, mode="r", shape=shape)
+        return np.fromfile(p, dtype=dtype).reshape(shape)
+
+    index = VectorIndex(dim)
+    index._buf = _raw("vectors.f32", np.float32, (n, dim))
+    index._n = n
+
+    offsets = _raw("texts.off", np.int64, (n + 1,))
+    blob_size = int(offsets[-1]) if n else 0
+    blob = _raw("texts.bin", np.uint8, (blob_size,))
+    with open(os.path.join(path, "metas.json"), "r", encoding="utf-8") as f:
+        cols = json.load(f)
+    index.texts = TextColumn(blob, offsets)  # type: ignore[assignment]
+    index.metadatas = MetaColumns(cols, n)  # type: ignore[assignment]
+
+    if "ivf" in manifest:
+        mode = "r" if mmap else None
+        ann = IVFIndex(np.load(os.path.join(path, "ivf_centroids.npy")), IVFParams(**manifest["ivf"]))
+        ann.assign = np.load(os.path.join(path, "ivf_assign.npy"), mmap_mode=mode)
+        if os.path.exists(os.path.join(path, "ivf_codes.npy")):
+            ann.codes = np.load(os.path.join(path, "ivf_codes.npy"), mmap_mode=mode)
+            ann.scales = np.load(os.path.join(path, "ivf_scales.npy"), mmap_mode=mode)
+        index.ann = ann
+    return index
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+
+# In-process BM25 over index texts (titles + abstracts, plus any full-text chunks).
+# Postings are stored CSR-style (term -> doc ids, precomputed BM25 weights), so a query is a
+# handful of array slices and one bincount; no network round trip is needed.
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or our that the their this "
+    "to was we were which with what how why when where who can do does using use used via".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    out: List[str] = []
+    for tok in _TOKEN.findall(text.lower()):
+        if tok in STOPWORDS:
+            continue
+        out.append(tok)
+        # Keep compound names (gpt-4o, llama-3.1) whole and also searchable by their parts.
+        if "-" in tok or "_" in tok or "." in tok:
+            out.extend(p for p in re.split(r"[-_.]", tok) if p and p not in STOPWORDS)
+    return out
+
+class LexicalIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}
+        self._doc_terms: List[np.ndarray] = []
+        self._doc_tfs: List[np.ndarray] = []
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._docs = np.empty(0, dtype=np.int32)
+        self._weights = np.empty(0, dtype=np.float32)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, texts: Iterable[str]) -> None:
+        for t in texts:
+            ids = [self.vocab.setdefault(tok, len(self.vocab)) for tok in tokenize(t)]
+            terms, tfs = np.unique(np.asarray(ids, dtype=np.int32), return_counts=True)
+            self._doc_terms.append(terms.astype(np.int32))
+            self._doc_tfs.append(tfs.astype(np.float32))
+        self._dirty = True
+
+    def keep(self, rows: Sequence[int]) -> None:
+        self._doc_terms = [self._doc_terms[i] for i in rows]
+        self._doc_tfs = [self._doc_tfs[i] for i in rows]
+        self._dirty = True
+
+    def _finalize(self) -> None:
+        if not self._dirty:
+            return
+        n = len(self._doc_terms)
+        V = len(self.vocab)
+        if n == 0:
+            self._offsets = np.zeros(V + 1, dtype=np.int64)
+            self._docs = np.empty(0, dtype=np.int32)
+            self._weights = np.empty(0, dtype=np.float32)
+            self._dirty = False
+            return
+        lens = np.array([tf.sum() for tf in self._doc_tfs], dtype=np.float32)
+        counts = np.array([len(t) for t in self._doc_terms], dtype=np.int64)
+        terms = np.concatenate(self._doc_terms)
+        tfs = np.concatenate(self._doc_tfs)
+        docs = np.repeat(np.arange(n, dtype=np.int32), counts)
+
+        df = np.bincount(terms, minlength=V).astype(np.float32)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        avgdl = float(lens.mean()) or 1.0
+        norm = self.k1 * (1.0 - self.b + self.b * lens[docs] / avgdl)
+        weights = idf[terms] * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+        order = np.argsort(terms, kind="stable")
+        self._docs = docs[order]
+        self._weights = weights[order].astype(np.float32)
+        self._offsets = np.concatenate(([0], np.cumsum(np.bincount(terms, minlength=V))))
+        self._dirty = False
+
+    def scores(self, query: str) -> np.ndarray:
+        """Dense BM25 score per document (0 for documents sharing no term with the query)."""
+        self._finalize()
+        n = len(self._doc_terms)
+        ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not ids or not n:
+            return np.zeros(n, dtype=np.float64)
+        docs = np.concatenate([self._docs[self._offsets[i]:self._offsets[i + 1]] for i in ids])
+        w = np.concatenate([self._weights[self._offsets[i]:self._offsets[i + 1]] for i in ids])
+        # A dense bincount is O(postings + n) with no sort, cheaper than unique() on long postings.
+        return np.bincount(docs, weights=w, minlength=n)
+
+    def search(self, query: str, k: int = 8) -> List[Tuple[int, float]]:
+        sc = self.scores(query)
+        k = min(k, int(np.count_nonzero(sc)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-sc, k - 1)[:k]
+        top = top[np.argsort(-sc[top])]
+        return [(int(i), float(sc[i])) for i in top]
+
+def rrf_fuse(rankings: Sequence[Sequence[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Reciprocal rank fusion: score(d) = sum over rankings of 1 / (k + rank)."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, d in enumerate(ranking, start=1):
+            fused[d] = fused.get(d, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda kv: -kv[1])
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.metrics import tracer
+from src.utils import stable_hash
+
+@dataclass
+class StreamStats:
+    started_at: float = 0.0
+    ttft_s: Optional[float] = None
+    total_s: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    chunks: int = 0
+    cached: bool = False
+
+    @property
+    def tokens_per_s(self) -> float:
+        gen_s = self.total_s - (self.ttft_s or 0.0)
+        return self.completion_tokens / gen_s if gen_s > 0 else 0.0
+
+    def summary(self) -> str:
+        if self.cached:
+            return f"served from completion cache in {self.total_s*1e3:.0f} ms"
+        ttft = f"{self.ttft_s:.2f}s" if self.ttft_s is not None else "n/a"
+        return f"first token {ttft} · {self.completion_tokens} tokens in {self.total_s:.1f}s · {self.tokens_per_s:.0f} tok/s"
+
+def stream_chat(
+    client,
+    *,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    stats: StreamStats | None = None,
+) -> Iterator[str]:
+    """Yield completion text deltas as they arrive. Closing the generator aborts the HTTP stream."""
+    stats = stats if stats is not None else StreamStats()
+    stats.started_at = time.perf_counter()
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    usage_seen = False
+    finished = False
+    try:
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None)
+            if usage is not None:
+                usage_seen = True
+                stats.prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+                stats.completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if stats.ttft_s is None:
+                    stats.ttft_s = time.perf_counter() - stats.started_at
+                stats.chunks += 1
+                if not usage_seen:
+                    stats.completion_tokens = stats.chunks
+                yield delta
+        finished = True
+    finally:
+        stats.total_s = time.perf_counter() - stats.started_at
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+        tracer.record(
+            "openai.chat", stats.total_s, model=model, ttft_s=stats.ttft_s,
+            prompt_tokens=stats.prompt_tokens, completion_tokens=stats.completion_tokens, aborted=not finished,
+        )
+
+def cached_stream_chat(
+    client,
+    cache,
+    *,
+    template: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    stats: StreamStats | None = None,
+) -> Iterator[str]:
+    """stream_chat behind a CompletionCache. A hit yields the stored text in one piece; a miss
+    is stored only if the stream ran to completion (not when the caller closed it early)."""
+    if cache is None:
+        yield from stream_chat(client, model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, stats=stats)
+        return
+    stats = stats if stats is not None else StreamStats()
+    key = cache.make_key(model=model, template=template, messages=messages, temperature=temperature, max_tokens=max_tokens)
+    stats.started_at = time.perf_counter()
+    with tracer.span("llm_cache.get", template=stable_hash(template)[:8]) as sp:
+        hit = cache.get(key)
+        sp["hit"] = hit is not None
+    if hit is not None:
+        stats.cached = True
+        stats.ttft_s = stats.total_s = time.perf_counter() - stats.started_at
+        yield hit
+        return
+    text = ""
+    for d in stream_chat(client, model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, stats=stats):
+        text += d
+        yield d
+    if text:
+        cache.put(key, text)
+
+def collect(deltas: Iterator[str], on_text: Callable[[str], Any] | None = None, min_interval_s: float = 0.05) -> str:
+    """Join deltas, calling on_text with the text so far at most every `min_interval_s` seconds."""
+    text = ""
+    last = 0.0
+    try:
+        for d in deltas:
+            text += d
+            now = time.perf_counter()
+            if on_text is not None and now - last >= min_interval_s:
+                on_text(text)
+                last = now
+    finally:
+        close = getattr(deltas, "close", None)
+        if close is not None:
+            close()
+    return text
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Process-wide timing spans. Each span has a name ("openai.chat", "arxiv.fetch", ...), a duration
+# and free-form attributes (model, tokens, cost_usd, cache hit, ...). Finished spans feed running
+# per-name aggregates (Prometheus text), a bounded ring for the debug panel, and an optional
+# JSONL trace file.
+
+# USD per 1M tokens (input, output). Approximate list prices; unknown models cost 0.
+PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+    "text-embedding-ada-002": (0.10, 0.0),
+    "sonar": (1.00, 1.00),
+    "sonar-pro": (3.00, 15.00),
+}
+
+def estimate_cost(model: str, prompt_tokens: int = 0, completion_tokens: int = 0) -> float:
+    # Dated snapshots ("gpt-4o-mini-2024-07-18") price like their base model.
+    base = max((m for m in PRICES if model == m or model.startswith(m + "-")), key=len, default=None)
+    if base is None:
+        return 0.0
+    p_in, p_out = PRICES[base]
+    return (prompt_tokens * p_in + completion_tokens * p_out) / 1e6
+
+_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+@dataclass
+class Span:
+    name: str
+    start: float  # unix time
+    duration_s: float
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    seq: int = 0
+
+@dataclass
+class _Agg:
+    count: int = 0
+    errors: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(_BUCKETS))
+
+class Tracer:
+    def __init__(self, max_spans: int = 5000):
+        self._lock = threading.Lock()
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._aggs: Dict[str, _Agg] = {}
+        self._seq = 0
+        self._trace_path = ""
+
+    def set_trace_path(self, path: str) -> None:
+        """Append every finished span as one JSON line to `path` ("" turns the trace off)."""
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._trace_path = path
+
+    def record(self, name: str, duration_s: float, **attrs: Any) -> Span:
+        """Record an already-measured span."""
+        if "cost_usd" not in attrs and "model" in attrs and ("prompt_tokens" in attrs or "completion_tokens" in attrs):
+            attrs["cost_usd"] = estimate_cost(attrs["model"], attrs.get("prompt_tokens", 0), attrs.get("completion_tokens", 0))
+        span = Span(name, time.time() - duration_s, duration_s, attrs)
+        with self._lock:
+            self._seq += 1
+            span.seq = self._seq
+            self._spans.append(span)
+            a = self._aggs.setdefault(name, _Agg())
+            a.count += 1
+            a.errors += 1 if attrs.get("error") else 0
+            a.total_s += duration_s
+            a.max_s = max(a.max_s, duration_s)
+            a.prompt_tokens += int(attrs.get("prompt_tokens", 0) or 0)
+            a.completion_tokens += int(attrs.get("completion_tokens", 0) or 0)
+            a.cost_usd += float(attrs.get("cost_usd", 0.0) or 0.0)
+            for i, le in enumerate(_BUCKETS):
+                if duration_s <= le:
+                    a.buckets[i] += 1
+                    break
+        if self._trace_path:
+            line = json.dumps(asdict(span), default=str) + "\n"
+            with open(self._trace_path, "a", encoding="utf-8") as f:
+                f.write(line)  # one small append per span; lines from concurrent writers do not interleave
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Time the block; the yielded dict can be filled with attributes (tokens, hits, ...)."""
+        t0 = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(name, time.perf_counter() - t0, **attrs)
+
+    def mark(self) -> int:
+        """Sequence number of the latest span; pass it to `spans(since=...)` to scope a view."""
+        with self._lock:
+            return self._seq
+
+    def spans(self, since: int = 0) -> List[Span]:
+        with self._lock:
+            return [s for s in self._spans if s.seq > since]
+
+    def summary(self, since: int | None = None) -> List[Dict[str, Any]]:
+        """Per-name totals, slowest first (from the ring since `since`, or all-time aggregates)."""
+        if since is None:
+            with self._lock:
+                items = [(n, a.count, a.total_s, a.max_s, a.prompt_tokens + a.completion_tokens, a.cost_usd)
+                         for n, a in self._aggs.items()]
+        else:
+            acc: Dict[str, List[float]] = {}
+            for s in self.spans(since):
+                r = acc.setdefault(s.name, [0, 0.0, 0.0, 0, 0.0])
+                r[0] += 1
+                r[1] += s.duration_s
+                r[2] = max(r[2], s.duration_s)
+                r[3] += int(s.attrs.get("prompt_tokens", 0) or 0) + int(s.attrs.get("completion_tokens", 0) or 0)
+                r[4] += float(s.attrs.get("cost_usd", 0.0) or 0.0)
+            items = [(n, int(r[0]), r[1], r[2], int(r[3]), r[4]) for n, r in acc.items()]
+        rows = [
+            {"span": n, "count": c, "total_s": round(t, 4), "mean_ms": round(t / c * 1e3, 2) if c else 0.0,
+             "max_ms": round(m * 1e3, 2), "tokens": tok, "cost_usd": round(cost, 6)}
+            for n, c, t, m, tok, cost in items
+        ]
+        return sorted(rows, key=lambda r: -r["total_s"])
+
+    def prometheus(self, prefix: str = "arxivpulse") -> str:
+        with self._lock:
+            aggs = {n: (a.count, a.errors, a.total_s, list(a.buckets), a.prompt_tokens, a.completion_tokens, a.cost_usd)
+                    for n, a in self._aggs.items()}
+        lines = [
+            f"# HELP {prefix}_span_seconds Duration of instrumented operations.",
+            f"# TYPE {prefix}_span_seconds histogram",
+        ]
+        for n, (count, _, total, buckets, *_rest) in sorted(aggs.items()):
+            cum = 0
+            for le, b in zip(_BUCKETS, buckets):
+                cum += b
+                lines.append(f'{prefix}_span_seconds_bucket{{span="{n}",le="{le}"}} {cum}')
+            lines.append(f'{prefix}_span_seconds_bucket{{span="{n}",le="+Inf"}} {count}')
+            lines.append(f'{prefix}_span_seconds_sum{{span="{n}"}} {total:.6f}')
+            lines.append(f'{prefix}_span_seconds_count{{span="{n}"}} {count}')
+        lines += [f"# TYPE {prefix}_span_errors_total counter"]
+        lines += [f'{prefix}_span_errors_total{{span="{n}"}} {v[1]}' for n, v in sorted(aggs.items())]
+        lines += [f"# TYPE {prefix}_tokens_total counter"]
+        for n, v in sorted(aggs.items()):
+            if v[4] or v[5]:
+                lines.append(f'{prefix}_tokens_total{{span="{n}",kind="prompt"}} {v[4]}')
+                lines.append(f'{prefix}_tokens_total{{span="{n}",kind="completion"}} {v[5]}')
+        lines += [f"# TYPE {prefix}_cost_usd_total counter"]
+        lines += [f'{prefix}_cost_usd_total{{span="{n}"}} {v[6]:.6f}' for n, v in sorted(aggs.items()) if v[6]]
+        return "\n".join(lines) + "\n"
+
+    def jsonl(self, since: int = 0) -> str:
+        return "".join(json.dumps(asdict(s), default=str) + "\n" for s in self.spans(since))
+
+tracer = Tracer()
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+def serve_prometheus(port: int, host: str = "0.0.0.0") -> None:
+    """Serve `tracer.prometheus()` at http://host:port/metrics from a daemon thread (idempotent)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    global _server
+    with _server_lock:
+        if _server is not None or not port:
+            return
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        _server = ThreadingHTTPServer((host, int(port)), _Handler)
+        threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from src.arxiv import Paper
+
+# Columnar paper storage. Every string field lives once, UTF-8 encoded, in one bytearray per
+# field with int64 offsets; author names are interned into a shared table and each paper keeps
+# int32 ids into it. Rows are addressed by position (row i is P{i+1}), and `Paper` objects are
+# built on access, so the index's texts/metadatas and the prompts can all reference the store
+# instead of holding their own copies of titles and abstracts.
+
+_FIELDS = ("arxiv_id", "title", "summary", "published", "updated", "abs_url", "pdf_url")
+
+class _StrColumn:
+    __slots__ = ("blob", "off")
+
+    def __init__(self) -> None:
+        self.blob = bytearray()
+        self.off = array("q", [0])
+
+    def append(self, s: str) -> None:
+        self.blob += s.encode("utf-8")
+        self.off.append(len(self.blob))
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.off[i]:self.off[i + 1]].decode("utf-8")
+
+    def nbytes(self) -> int:
+        return len(self.blob) + self.off.itemsize * len(self.off)
+
+class PaperStore(Sequence[Paper]):
+    def __init__(self, papers: Iterable[Paper] = ()):
+        self._cols = {f: _StrColumn() for f in _FIELDS}
+        self._author_ids = array("i")
+        self._author_off = array("q", [0])
+        self._author_names: List[str] = []
+        self._author_index: Dict[str, int] = {}
+        self._n = 0
+        self.extend(papers)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def append(self, p: Paper) -> int:
+        for f in _FIELDS:
+            self._cols[f].append(getattr(p, f))
+        for name in p.authors:
+            aid = self._author_index.get(name)
+            if aid is None:
+                aid = self._author_index[name] = len(self._author_names)
+                self._author_names.append(sys.intern(name))
+            self._author_ids.append(aid)
+        self._author_off.append(len(self._author_ids))
+        self._n += 1
+        return self._n - 1
+
+    def extend(self, papers: Iterable[Paper]) -> None:
+        for p in papers:
+            self.append(p)
+
+    def _row(self, i: int) -> int:
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return i
+
+    def field(self, i: int, name: str) -> str:
+        return self._cols[name][self._row(i)]
+
+    def authors(self, i: int) -> List[str]:
+        i = self._row(i)
+        names = self._author_names
+        return [names[a] for a in self._author_ids[self._author_off[i]:self._author_off[i + 1]]]
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        i = self._row(i)
+        return Paper(authors=self.authors(i), **{f: self._cols[f][i] for f in _FIELDS})
+
+    def __iter__(self) -> Iterator[Paper]:
+        return (self[i] for i in range(self._n))
+
+    def text(self, i: int) -> str:
+        """Embedding / retrieval text of row i (same format as corpus.paper_records)."""
+        return f"Title: {self.field(i, 'title')}\nAbstract: {self.field(i, 'summary')}"
+
+    def meta(self, i: int) -> Dict[str, Any]:
+        return {
+            "pid": f"P{self._row(i) + 1}",
+            "arxiv_id": self.field(i, "arxiv_id"),
+            "title": self.field(i, "title"),
+            "abs_url": self.field(i, "abs_url"),
+            "pdf_url": self.field(i, "pdf_url"),
+            "published": self.field(i, "published"),
+            "authors": self.authors(i),
+        }
+
+    def nbytes(self) -> int:
+        n = sum(c.nbytes() for c in self._cols.values())
+        n += self._author_ids.itemsize * len(self._author_ids) + self._author_off.itemsize * len(self._author_off)
+        return n + sum(len(a) + 50 for a in self._author_names)
+
+class _StoreColumn(Sequence[Any], ABC):
+    # Rows [0, len(store)) are read from the store; rows appended later (full-text chunks) go to
+    # a plain list tail, so `VectorIndex.add` can extend the column without copying the store.
+    def __init__(self, store: PaperStore):
+        self._store = store
+        self.tail: List[Any] = []
+
+    @abstractmethod
+    def _row(self, i: int) -> Any:
+        """Value of paper row i."""
+
+    def __len__(self) -> int:
+        return len(self._store) + len(self.tail)
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        n = len(self._store)
+        return self._row(i) if i < n else self.tail[i - n]
+
+    def __iter__(self) -> Iterator[Any]:
+        return (self[i] for i in range(len(self)))
+
+    def extend(self, values: Iterable[Any]) -> None:
+        self.tail.extend(values)
+
+class StoreTexts(_StoreColumn):
+    """`VectorIndex.texts` column whose paper rows are read from a PaperStore."""
+
+    def _row(self, i: int) -> str:
+        return self._store.text(i)
+
+class StoreMetas(_StoreColumn):
+    """`VectorIndex.metadatas` column whose paper rows are read from a PaperStore."""
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        return self._store.meta(i)
+
+def as_store(papers: Sequence[Paper]) -> PaperStore:
+    return papers if isinstance(papers, PaperStore) else PaperStore(papers)
+
+def attach_store(index, store: PaperStore) -> bool:
+    """Point the index's abstract rows (P1..Pn, in store order) at `store` instead of per-row
+    strings and dicts. Only applies when the index holds exactly those rows."""
+    if len(index) != len(store):
+        return False
+    index.texts = StoreTexts(store)
+    index.metadatas = StoreMetas(store)
+    return True
@@ -3,6 +3,10 @@ from __future__ import annotations
 from typing import Any, Dict, List
 import httpx
 
+from src.http_client import cached_request
+from src.metrics import tracer
+from src.utils import stable_hash
+
 PPLX_CHAT_URL = "https://api.perplexity.ai/chat/completions"
 
 class PerplexityError(RuntimeError):
@@ -14,6 +18,7 @@ def web_signals(
     model: str,
     theme_summary: str,
     timeout_s: float = 45.0,
+    cache_ttl_s: float = 1800.0,
 ) -> str:
     if not api_key:
         raise PerplexityError("Missing PERPLEXITY_API_KEY")
@@ -40,16 +45,25 @@ def web_signals(
         "Accept": "application/json",
     }
 
-    try:
-        with httpx.Client(timeout=timeout_s) as client:
-            r = client.post(PPLX_CHAT_URL, headers=headers, json=body)
-    except httpx.HTTPError as e:
-        raise PerplexityError(f"Perplexity network error: {e}") from e
+    with tracer.span("perplexity.chat", model=model) as sp:
+        try:
+            r = cached_request(
+                "POST", PPLX_CHAT_URL, json_body=body, headers=headers, timeout_s=timeout_s,
+                ttl_s=cache_ttl_s, vary=stable_hash(api_key),
+            )
+        except httpx.HTTPError as e:
+            raise PerplexityError(f"Perplexity network error: {e}") from e
+        sp["status"] = r.status_code
+        sp["from_cache"] = r.from_cache
 
-    if r.status_code >= 400:
-        raise PerplexityError(f"Perplexity HTTP {r.status_code}: {r.text}")
+        if r.status_code >= 400:
+            raise PerplexityError(f"Perplexity HTTP {r.status_code}: {r.text}")
 
-    data = r.json()
+        data = r.json()
+        if not r.from_cache:
+            usage = data.get("usage") or {}
+            sp["prompt_tokens"] = int(usage.get("prompt_tokens", 0) or 0)
+            sp["completion_tokens"] = int(usage.get("completion_tokens", 0) or 0)
     try:
         return data["choices"][0]["message"]["content"] or ""
     except Exception:
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence
+
+from src.arxiv import ARXIV_DELAY_S, Paper, iter_papers
+from src.briefing import generate_briefing, needs_map_reduce
+from src.corpus import paper_records
+from src.dedup import Deduplicator, cluster_terms, topic_clusters
+from src.embeddings import EmbedOptions, get_or_embed
+from src.llm import StreamStats
+from src.metrics import tracer
+from src.paper_store import PaperStore, attach_store
+from src.perplexity_api import web_signals
+from src.rag import VectorIndex
+
+# "Fetch Papers" as one asyncio graph:
+#   fetch ─(dedup)─► embed batches (start while entries are still being parsed) ──► topics
+#         └─► briefing (as soon as the paper list is complete) ─┐
+#         └─► web signals (in parallel with the briefing)      ─┴─► done
+# Blocking SDK calls run in worker threads; every callback fires on the event-loop thread,
+# so callers may touch UI objects (e.g. Streamlit placeholders) from them.
+
+class _BriefingCancelled(Exception):
+    """Raised in the briefing thread once the consumer of its text has failed."""
+
+STAGES = ("fetch", "embed", "briefing", "web_signals")
+
+@dataclass
+class StageStatus:
+    name: str
+    state: str = "pending"  # pending | running | done | failed | skipped
+    started_at: float = 0.0
+    elapsed_s: float = 0.0
+    detail: str = ""
+
+@dataclass(frozen=True)
+class PipelineRequest:
+    category: str
+    keywords: str
+    max_results: int
+    embed_model: str
+    chat_model: str
+    briefing: bool = True
+    perplexity_key: str | None = None
+    pplx_model: str = "sonar-pro"
+    embed_batch: int = 16
+    dedup_threshold: float = 0.8
+    arxiv_delay_s: float = ARXIV_DELAY_S
+
+@dataclass
+class PipelineResult:
+    papers: PaperStore = field(default_factory=PaperStore)
+    index: Optional[VectorIndex] = None
+    briefing: str = ""
+    briefing_stats: Optional[StreamStats] = None
+    web_signals: str = ""
+    duplicates: Dict[str, str] = field(default_factory=dict)
+    topic_labels: List[int] = field(default_factory=list)
+    topics: Dict[int, List[str]] = field(default_factory=dict)
+    stages: Dict[str, StageStatus] = field(default_factory=lambda: {n: StageStatus(n) for n in STAGES})
+    errors: Dict[str, str] = field(default_factory=dict)
+    wall_s: float = 0.0
+
+_DONE = object()
+
+async def iterate_in_thread(make_iter: Callable[[], Iterator[Any]]) -> AsyncIterator[Any]:
+    """Drive a blocking iterator in a worker thread and re-yield its items on the event loop."""
+    loop = asyncio.get_running_loop()
+    q: "asyncio.Queue[Any]" = asyncio.Queue()
+    stop = threading.Event()
+
+    def _run() -> None:
+        it = None
+        try:
+            it = make_iter()
+            for item in it:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(q.put_nowait, (item, None))
+        except BaseException as e:
+            loop.call_soon_threadsafe(q.put_nowait, (_DONE, e))
+            return
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+        loop.call_soon_threadsafe(q.put_nowait, (_DONE, None))
+
+    loop.run_in_executor(None, _run)
+    try:
+        while True:
+            item, err = await q.get()
+            if item is _DONE:
+                if err is not None:
+                    raise err
+                return
+            yield item
+    finally:
+        stop.set()
+
+def theme_seed(req: PipelineRequest, papers: Sequence[Paper], n: int = 15) -> str:
+    titles = "\n".join(f"- {p.title}" for p in papers[:n])
+    return f"Themes: {req.keywords or req.category}\nRecent paper titles:\n{titles}"
+
+async def run_pipeline(
+    req: PipelineRequest,
+    *,
+    openai_client,
+    cache,
+    embed_opts: EmbedOptions | None = None,
+    llm_cache=None,
+    on_progress: Callable[[Dict[str, StageStatus]], Any] | None = None,
+    on_briefing_text: Callable[[str], Any] | None = None,
+) -> PipelineResult:
+    t0 = time.perf_counter()
+    res = PipelineResult()
+    index = VectorIndex()
+
+    def mark(name: str, state: str, detail: str = "") -> None:
+        s = res.stages[name]
+        now = time.perf_counter()
+        if state == "running" and s.state != "running":
+            s.started_at = now
+        if s.started_at:
+            s.elapsed_s = now - s.started_at
+        s.state, s.detail = state, detail
+        if state in ("done", "failed"):
+            tracer.record(f"pipeline.{name}", s.elapsed_s, state=state, detail=detail)
+        if on_progress is not None:
+            on_progress(res.stages)
+
+    workers = asyncio.Semaphore(max(1, (embed_opts or EmbedOptions()).max_workers))
+    embed_tasks: List["asyncio.Task[Any]"] = []
+    pending: List[Paper] = []
+    dedup = Deduplicator(threshold=req.dedup_threshold)
+    embedded = asyncio.Event()
+
+    async def embed_batch(start: int, batch: List[Paper]):
+        texts, metas = paper_records(batch, start=start)
+        async with workers:
+            vecs = await asyncio.to_thread(get_or_embed, openai_client, req.embed_model, texts, cache, embed_opts)
+        return vecs, metas, texts
+
+    def flush() -> None:
+        start = len(res.papers) - len(pending) + 1
+        embed_tasks.append(asyncio.create_task(embed_batch(start, list(pending))))
+        pending.clear()
+
+    mark("fetch", "running")
+    try:
+        papers_iter = lambda: iter_papers(
+            category=req.category,
+            keyword_query=req.keywords,
+            max_results=int(req.max_results),
+            page_size=int(req.max_results),
+            delay_s=req.arxiv_delay_s,
+            cache_ttl_s=600.0,
+        )
+        async for p in iterate_in_thread(papers_iter):
+            if dedup.check(p) is not None:
+                continue
+            res.papers.append(p)
+            pending.append(p)
+            if len(pending) >= req.embed_batch:
+                flush()
+            mark("fetch", "running", f"{len(res.papers)} papers")
+        if pending:
+            flush()
+    except Exception as e:
+        for t in embed_tasks:
+            t.cancel()
+        res.errors["fetch"] = str(e)
+        mark("fetch", "failed", str(e))
+        res.wall_s = time.perf_counter() - t0
+        return res
+    res.duplicates = dict(dedup.duplicates)
+    dup_note = f" ({len(res.duplicates)} duplicates dropped)" if res.duplicates else ""
+    mark("fetch", "done", f"{len(res.papers)} papers{dup_note}")
+
+    async def embed_all() -> None:
+        mark("embed", "running", f"0/{len(res.papers)}")
+        try:
+            try:
+                for t in embed_tasks:  # add in P# order
+                    vecs, metas, texts = await t
+                    index.add(vecs, metas, texts)
+                    mark("embed", "running", f"{len(index)}/{len(res.papers)}")
+            except BaseException:
+                # Stop the other batches from calling the API and retrieve their exceptions.
+                for t in embed_tasks:
+                    t.cancel()
+                await asyncio.gather(*embed_tasks, return_exceptions=True)
+                raise
+            attach_store(index, res.papers)
+            index.enable_lexical()
+            res.index = index
+            if len(index):
+                labels = topic_clusters(index.vectors)
+                res.topic_labels = labels.tolist()
+                res.topics = cluster_terms([f"{p.title} {p.summary}" for p in res.papers], labels)
+        finally:
+            embedded.set()
+        mark("embed", "done", f"{len(index)} vectors, {len(res.topics)} topics")
+
+    async def brief() -> None:
+        if not req.briefing or not res.papers:
+            mark("briefing", "skipped")
+            return
+        mark("briefing", "running")
+        loop = asyncio.get_running_loop()
+        stats = StreamStats()
+        deltas: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def _on_text(t: str) -> None:
+            # Runs in the briefing thread. Raising here makes collect() close the stream.
+            if cancelled.is_set():
+                raise _BriefingCancelled()
+            if on_briefing_text is not None:
+                loop.call_soon_threadsafe(deltas.put_nowait, t)
+
+        # A map-reduce briefing batches papers by topic, so it waits for the embeddings; a single prompt doesn't.
+        labels = None
+        if needs_map_reduce(res.papers):
+            await embedded.wait()
+            labels = res.topic_labels or None
+        # generate_briefing picks single-shot or map-reduce in a thread; its text snapshots come back
+        # through `deltas` and on_briefing_text runs here, so an exception from it (e.g. a UI
+        # framework stopping the run) propagates out of the pipeline and cancels the stream.
+        job = asyncio.ensure_future(asyncio.to_thread(
+            generate_briefing, openai_client, req.chat_model, res.papers, _on_text, stats, llm_cache, labels=labels
+        ))
+        job.add_done_callback(lambda _: deltas.put_nowait(None))
+        try:
+            while True:
+                batch = [await deltas.get()]
+                while not deltas.empty():
+                    batch.append(deltas.get_nowait())
+                snapshots = [t for t in batch if t is not None]
+                if snapshots and on_briefing_text is not None:
+                    on_briefing_text(snapshots[-1])  # only the latest snapshot is worth rendering
+                if batch[-1] is None:
+                    break
+        except BaseException:
+            cancelled.set()
+            job.add_done_callback(lambda f: f.cancelled() or f.exception())
+            raise
+        text = await job
+        res.briefing, res.briefing_stats = text, stats
+        mark("briefing", "done", stats.summary())
+
+    async def signals() -> None:
+        if not req.perplexity_key or not res.papers:
+            mark("web_signals", "skipped")
+            return
+        mark("web_signals", "running")
+        res.web_signals = await asyncio.to_thread(
+            web_signals, req.perplexity_key, model=req.pplx_model, theme_summary=theme_seed(req, res.papers)[:3500]
+        )
+        mark("web_signals", "done")
+
+    outcomes = await asyncio.gather(embed_all(), brief(), signals(), return_exceptions=True)
+    for name, out in zip(("embed", "briefing", "web_signals"), outcomes):
+        if isinstance(out, BaseException) and not isinstance(out, Exception):
+            raise out  # e.g. a UI framework aborting the run
+        if isinstance(out, BaseException):
+            res.errors[name] = str(out)
+            mark(name, "failed", str(out))
+    res.wall_s = time.perf_counter() - t0
+    tracer.record("pipeline.total", res.wall_s, papers=len(res.papers), errors=len(res.errors))
+    return res
+
+def run_pipeline_sync(req: PipelineRequest, **kwargs: Any) -> PipelineResult:
+    return asyncio.run(run_pipeline(req, **kwargs))
@@ -38,3 +38,62 @@ Respond with:
 - Answer (6-10 bullets, each with citations)
 - If relevant: a short 'What to prototype next' section (3 bullets, each with citations)
 """
+
+# Map-reduce briefing for paper sets too large for one prompt.
+
+BRIEF_MAP_USER = """You are given one batch of recent arXiv papers (titles and abstracts) out of a larger set.
+
+Write compact analyst notes for this batch only:
+- Themes (up to 4 bullets)
+- Notable papers (up to 4 bullets)
+- Practical implications (up to 4 bullets)
+- Product ideas (up to 4 bullets)
+- Skills / hiring keywords (up to 8, comma-separated)
+
+Every bullet must cite papers exactly as labelled, e.g. [P12]. Never renumber papers.
+
+Papers:
+{abstracts}
+"""
+
+BRIEF_MERGE_USER = """Merge these analyst notes from different paper batches into one set of notes with the same sections.
+Keep the most important points, merge duplicates, and keep every [P#] citation exactly as written.
+
+Notes:
+{notes}
+"""
+
+BRIEF_REDUCE_USER = """You are given analyst notes that were written over batches of recent arXiv papers.
+
+Write an industry briefing with:
+1) Top themes (5 bullets)
+2) Notable papers (5 bullets, each bullet must cite [P#])
+3) Practical implications (5 bullets, each with [P#])
+4) Product ideas to build (6 bullets, each with [P#])
+5) Hiring keywords / skills implied (10 keywords)
+
+Only cite [P#] labels that appear in the notes, exactly as written.
+
+Paper list (papers cited in the notes):
+{paper_list}
+
+Batch notes:
+{notes}
+"""
+
+# Second-stage reranking of retrieved evidence (src/rerank.py).
+
+RERANK_SYSTEM = (
+  "You grade how useful evidence snippets are for answering a question. "
+  "Reply with JSON only."
+)
+
+RERANK_USER = """Question:
+{question}
+
+Rate each snippet from 0 (irrelevant) to 10 (directly answers the question).
+
+{snippets}
+
+Reply as {{"scores": [s1, s2, ...]}} with exactly {n} numbers, in snippet order.
+"""
@@ -1,29 +1,188 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 import numpy as np
 
-def cosine_sim_matrix(A: np.ndarray, b: np.ndarray) -> np.ndarray:
-    A_norm = A / (np.linalg.norm(A, axis=1, keepdims=True) + 1e-12)
-    b_norm = b / (np.linalg.norm(b) + 1e-12)
-    return A_norm @ b_norm
+from src.ann import IVFIndex, IVFParams
+from src.lexical import LexicalIndex, rrf_fuse
+from src.metrics import tracer
+
+def l2_normalize(A: Any) -> np.ndarray:
+    A = np.asarray(A, dtype=np.float32)
+    if A.ndim == 1:
+        return A / (np.linalg.norm(A) + 1e-12)
+    return A / (np.linalg.norm(A, axis=1, keepdims=True) + 1e-12)
 
-@dataclass
 class VectorIndex:
-    vectors: np.ndarray
-    metadatas: List[Dict[str, Any]]
-    texts: List[str]
+    """Rows are stored L2-normalized in a float32 buffer that grows geometrically, so cosine
+    similarity is a plain dot product and add() is amortized O(rows added)."""
+
+    def __init__(self, dim: int = 0):
+        self.dim = int(dim)
+        self._buf = np.empty((0, self.dim), dtype=np.float32)
+        self._n = 0
+        self.metadatas: List[Dict[str, Any]] = []
+        self.texts: List[str] = []
+        self.ann: Optional[IVFIndex] = None
+        self.lexical: Optional[LexicalIndex] = None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._buf[:self._n]
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _reserve(self, n: int) -> None:
+        if n <= self._buf.shape[0]:
+            return
+        cap = max(n, 2 * self._buf.shape[0], 16)
+        buf = np.empty((cap, self.dim), dtype=np.float32)
+        buf[:self._n] = self._buf[:self._n]
+        self._buf = buf
+
+    def _own(self) -> None:
+        # Indexes loaded from disk are read-only memory maps; copy on first mutation. Columns that
+        # can grow in place (plain lists, paper_store columns) are kept as they are.
+        if not self._buf.flags.writeable:
+            self._buf = np.array(self._buf)
+        if not hasattr(self.metadatas, "extend"):
+            self.metadatas = list(self.metadatas)
+        if not hasattr(self.texts, "extend"):
+            self.texts = list(self.texts)
+
+    def add(self, vectors: Any, metadatas: Sequence[Dict[str, Any]], texts: Sequence[str]) -> None:
+        mat = l2_normalize(vectors)
+        if mat.ndim == 1:
+            mat = mat.reshape(1, -1) if mat.size else mat.reshape(0, self.dim)
+        if not (len(mat) == len(metadatas) == len(texts)):
+            raise ValueError("vectors, metadatas and texts must have the same length")
+        if not len(mat):
+            return
+        if self._n == 0 and self.dim != mat.shape[1]:
+            self.dim = int(mat.shape[1])
+            self._buf = np.empty((0, self.dim), dtype=np.float32)
+        if mat.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dim vectors, got {mat.shape[1]}")
+        self._reserve(self._n + len(mat))
+        self._own()
+        self._buf[self._n:self._n + len(mat)] = mat
+        self._n += len(mat)
+        if self.ann is not None:
+            self.ann.add(mat)
+        if self.lexical is not None:
+            self.lexical.add(texts)
+        self.metadatas.extend(metadatas)
+        self.texts.extend(texts)
+
+    def remove(self, rows: Iterable[int]) -> None:
+        drop = np.zeros(self._n, dtype=bool)
+        drop[np.fromiter(rows, dtype=np.int64)] = True
+        if not drop.any():
+            return
+        keep = np.flatnonzero(~drop)
+        self._own()
+        self._buf[:len(keep)] = self._buf[keep]
+        self._n = len(keep)
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self.texts = [self.texts[i] for i in keep]
+        if self.ann is not None:
+            self.ann.keep(keep)
+        if self.lexical is not None:
+            self.lexical.keep(keep)
+
+    def enable_lexical(self) -> LexicalIndex:
+        if self.lexical is None:
+            lex = LexicalIndex()
+            lex.add(self.texts)
+            self.lexical = lex
+        return self.lexical
+
+    def train_ann(self, params: IVFParams | None = None) -> None:
+        self.ann = IVFIndex.train(self.vectors, params or IVFParams()) if self._n else None
 
-def build_index(vectors: List[List[float]], metadatas: List[Dict[str, Any]], texts: List[str]) -> VectorIndex:
-    mat = np.array(vectors, dtype=np.float32)
-    return VectorIndex(vectors=mat, metadatas=metadatas, texts=texts)
+def build_index(
+    vectors: Any,
+    metadatas: List[Dict[str, Any]],
+    texts: List[str],
+    *,
+    ann: IVFParams | None = None,
+    lexical: bool = True,
+) -> VectorIndex:
+    index = VectorIndex()
+    index.add(vectors, metadatas, texts)
+    if ann is not None:
+        index.train_ann(ann)
+    if lexical:
+        index.enable_lexical()
+    return index
+
+Hit = Tuple[float, Dict[str, Any], str]
+
+def top_k(index: VectorIndex, query_vec: Any, k: int = 8, *, nprobe: int | None = None) -> List[Hit]:
+    if not len(index):
+        return []
+    with tracer.span("retrieval.top_k", rows=len(index), k=k, ann=index.ann is not None):
+        return [(s, index.metadatas[i], index.texts[i]) for i, s in _vector_rows(index, query_vec, k, nprobe)]
+
+def top_k_batch(index: VectorIndex, Q: Any, k: int = 8, *, max_block_bytes: int = 64 << 20) -> List[List[Hit]]:
+    Qn = l2_normalize(Q)
+    if Qn.ndim == 1:
+        Qn = Qn.reshape(1, -1)
+    if index.ann is not None:
+        return [top_k(index, q, k) for q in Qn]
+    n = len(index)
+    k = min(k, n)
+    if k <= 0:
+        return [[] for _ in range(len(Qn))]
+
+    out: List[List[Hit]] = []
+    # Score queries in blocks so the (queries x corpus) score matrix stays bounded.
+    block = max(1, max_block_bytes // (4 * n))
+    V = index.vectors
+    for s in range(0, len(Qn), block):
+        S = Qn[s:s+block] @ V.T
+        part = np.argpartition(-S, k - 1, axis=1)[:, :k]
+        ps = np.take_along_axis(S, part, axis=1)
+        order = np.argsort(-ps, axis=1)
+        idxs = np.take_along_axis(part, order, axis=1)
+        scores = np.take_along_axis(ps, order, axis=1)
+        for row_i, row_s in zip(idxs.tolist(), scores.tolist()):
+            out.append([(sc, index.metadatas[i], index.texts[i]) for i, sc in zip(row_i, row_s)])
+    return out
+
+def lexical_top_k(index: VectorIndex, query: str, k: int = 8) -> List[Hit]:
+    with tracer.span("retrieval.lexical", rows=len(index), k=k):
+        return [(s, index.metadatas[i], index.texts[i]) for i, s in index.enable_lexical().search(query, k)]
+
+def hybrid_top_k(
+    index: VectorIndex,
+    query: str,
+    query_vec: Any = None,
+    k: int = 8,
+    *,
+    depth: int = 50,
+    rrf_k: int = 60,
+) -> List[Hit]:
+    """Fuse BM25 and vector rankings with reciprocal rank fusion (scores are RRF scores, not cosines).
+    Without a query vector this is the lexical-only fast path with BM25 scores."""
+    if query_vec is None:
+        return lexical_top_k(index, query, k)
+    if not len(index):
+        return []
+    with tracer.span("retrieval.hybrid", rows=len(index), k=k, depth=depth):
+        lex = [i for i, _ in index.enable_lexical().search(query, depth)]
+        vec = [i for i, _ in _vector_rows(index, query_vec, depth)]
+        return [(s, index.metadatas[i], index.texts[i]) for i, s in rrf_fuse([lex, vec], k=rrf_k)[:k]]
 
-def top_k(index: VectorIndex, query_vec: List[float], k: int = 8) -> List[Tuple[float, Dict[str, Any], str]]:
-    q = np.array(query_vec, dtype=np.float32)
-    sims = cosine_sim_matrix(index.vectors, q)
+def _vector_rows(index: VectorIndex, query_vec: Any, k: int, nprobe: int | None = None) -> List[Tuple[int, float]]:
+    q = l2_normalize(query_vec)
+    if index.ann is not None:
+        idxs, scores = index.ann.search(index.vectors, q, k, nprobe)
+        return list(zip(idxs.tolist(), scores.tolist()))
+    sims = index.vectors @ q
     k = min(k, len(sims))
     if k <= 0:
         return []
     idxs = np.argpartition(-sims, k - 1)[:k]
     idxs = idxs[np.argsort(-sims[idxs])]
-    return [(float(sims[i]), index.metadatas[i], index.texts[i]) for i in idxs]
+    return [(int(i), float(sims[i])) for i in idxs]
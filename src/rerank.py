@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.embeddings import approx_tokens
+from src.metrics import tracer
+from src.prompts import RERANK_SYSTEM, RERANK_USER
+from src.rag import Hit
+from src.utils import stable_hash
+
+# Second retrieval stage for chat: over-fetch candidates (vector / BM25 / hybrid), have the chat
+# model grade each (question, snippet) pair in small parallel batches, then pack the best
+# snippets into a token budget. Grades are memoized per pair in a cache of their own, so a
+# repeated or rephrased-identical question only pays for snippets it has not seen.
+
+@dataclass(frozen=True)
+class RerankOptions:
+    batch_size: int = 10  # snippets per grading call
+    max_workers: int = 4  # grading calls in flight
+    snippet_chars: int = 1200  # evidence shown to the grader
+    min_score: float = 3.0  # drop snippets graded below this (0-10), keeping at least one
+
+_NUM = re.compile(r"-?\d+(?:\.\d+)?")
+
+def score_key(model: str, question: str, text: str) -> str:
+    return stable_hash(f"rerank|{model}|{question.strip()}|{stable_hash(text)}")
+
+def _parse_scores(raw: str, n: int) -> List[Optional[float]]:
+    try:
+        vals = json.loads(raw)["scores"]
+    except (ValueError, KeyError, TypeError):
+        vals = _NUM.findall(raw or "")
+    try:
+        scores = [min(10.0, max(0.0, float(v))) for v in vals]
+    except (TypeError, ValueError):
+        return [None] * n
+    return scores if len(scores) == n else [None] * n
+
+def _grade(client, model: str, question: str, texts: Sequence[str], snippet_chars: int) -> List[Optional[float]]:
+    snippets = "\n\n".join(f"[{i}] {t[:snippet_chars]}" for i, t in enumerate(texts, start=1))
+    messages = [
+        {"role": "system", "content": RERANK_SYSTEM},
+        {"role": "user", "content": RERANK_USER.format(question=question, snippets=snippets, n=len(texts))},
+    ]
+    t0 = time.perf_counter()
+    attrs: Dict[str, Any] = {"model": model, "snippets": len(texts)}
+    try:
+        resp = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.0,
+            max_tokens=16 + 6 * len(texts),
+            response_format={"type": "json_object"},
+        )
+        usage = getattr(resp, "usage", None)
+        if usage is not None:
+            attrs["prompt_tokens"] = getattr(usage, "prompt_tokens", 0) or 0
+            attrs["completion_tokens"] = getattr(usage, "completion_tokens", 0) or 0
+        return _parse_scores(resp.choices[0].message.content or "", len(texts))
+    except Exception as e:
+        # A failed batch keeps its first-stage order; chat should not fail because grading did.
+        attrs["error"] = type(e).__name__
+        return [None] * len(texts)
+    finally:
+        tracer.record("openai.rerank", time.perf_counter() - t0, **attrs)
+
+def llm_scores(
+    client,
+    model: str,
+    question: str,
+    texts: Sequence[str],
+    *,
+    cache=None,
+    opts: RerankOptions | None = None,
+) -> List[Optional[float]]:
+    """0-10 relevance grade per text (None where grading failed), served from `cache` when known."""
+    opts = opts or RerankOptions()
+    scores: List[Optional[float]] = [None] * len(texts)
+    keys = [score_key(model, question, t) for t in texts]
+    missing: List[int] = []
+    for i, k in enumerate(keys):
+        hit = cache.get(k) if cache is not None else None
+        if hit is None:
+            missing.append(i)
+        else:
+            scores[i] = float(hit)
+    if missing:
+        batches = [missing[s:s + opts.batch_size] for s in range(0, len(missing), opts.batch_size)]
+        with ThreadPoolExecutor(max_workers=max(1, min(opts.max_workers, len(batches)))) as pool:
+            graded = pool.map(lambda b: _grade(client, model, question, [texts[i] for i in b], opts.snippet_chars), batches)
+            for batch, got in zip(batches, graded):
+                for i, s in zip(batch, got):
+                    scores[i] = s
+                    if s is not None and cache is not None:
+                        cache.put(keys[i], repr(s))
+    return scores
+
+def rerank(
+    client,
+    model: str,
+    question: str,
+    hits: Sequence[Hit],
+    *,
+    cache=None,
+    opts: RerankOptions | None = None,
+) -> List[Hit]:
+    """Reorder first-stage `hits` by LLM grade and drop weak evidence. The returned hits carry the
+    grade as their score; ungraded hits are treated as borderline and keep their relative order."""
+    opts = opts or RerankOptions()
+    if not hits:
+        return []
+    with tracer.span("retrieval.rerank", model=model, candidates=len(hits)) as sp:
+        scores = llm_scores(client, model, question, [txt for _, _, txt in hits], cache=cache, opts=opts)
+        graded = [opts.min_score if s is None else s for s in scores]
+        order = sorted(range(len(hits)), key=lambda i: (-graded[i], i))
+        kept = [i for i in order if graded[i] >= opts.min_score] or order[:1]
+        sp["ungraded"] = sum(s is None for s in scores)
+        sp["kept"] = len(kept)
+    return [(graded[i], hits[i][1], hits[i][2]) for i in kept]
+
+def format_evidence(meta: Dict[str, Any], txt: str) -> str:
+    where = f" ({meta['section']}, chunk {meta['chunk']})" if meta.get("section") else " (abstract)"
+    return f"[{meta['pid']}] {meta['title']}{where}\nURL: {meta['abs_url']}\nEvidence: {txt}\n"
+
+def build_context(hits: Sequence[Hit], *, budget_tokens: int = 3000, max_hits: int = 8) -> Tuple[str, int]:
+    """Pack hits, best first, into at most ~budget_tokens of evidence. Hits that do not fit are
+    skipped (a later, shorter one may); the first hit is clipped rather than dropped. Returns
+    (context, number of hits used)."""
+    blocks: List[str] = []
+    used = 0
+    for _, meta, txt in hits:
+        if len(blocks) >= max_hits:
+            break
+        block = format_evidence(meta, txt)
+        n = approx_tokens(block)
+        if used + n > budget_tokens:
+            if blocks:
+                continue
+            block = block[:max(0, budget_tokens * 4)]
+            n = approx_tokens(block)
+        blocks.append(block)
+        used += n
+    return "\n".join(blocks), len(blocks)
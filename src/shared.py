@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+
+from src.arxiv import Paper
+from src.paper_store import PaperStore, StoreMetas, StoreTexts
+from src.utils import stable_hash
+
+if TYPE_CHECKING:
+    from src.rag import VectorIndex
+
+# Process-wide registry of paper views. A Streamlit session keeps only the view key (the view's
+# directory, derived from category / keywords / max papers / embed model / full text), so every
+# session looking at the same view reads the same papers and index. Views are evicted LRU once
+# the estimated resident size passes `max_bytes`; an evicted view is reloaded from disk on the
+# next access.
+
+@dataclass
+class SharedView:
+    papers: Sequence[Paper]
+    index: VectorIndex
+    briefing: str = ""
+    briefing_stats: str = ""
+    web_signals: str = ""
+    topic_labels: List[int] = field(default_factory=list)
+    topics: Dict[int, List[str]] = field(default_factory=dict)
+    meta: Dict[str, Any] = field(default_factory=dict)
+    version: str = field(default="", repr=False)
+    # Sessions share a view: writes after it is published (briefing, web signals, version) happen
+    # under this lock. The index is complete (lexical included) before the view is published.
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
+
+def view_version(view: SharedView) -> str:
+    """Fingerprint of the papers and index rows a view answers from; changes when the paper set
+    is refetched with different papers or full-text rows are added."""
+    with view.lock:
+        n = len(view.index)
+        if not view.version.endswith(f":{n}"):
+            ids = "|".join(p.arxiv_id for p in view.papers)
+            view.version = f"{stable_hash(ids)[:16]}:{n}"
+        return view.version
+
+def _array_bytes(a: Any) -> int:
+    import numpy as np  # only reached once a view (and so numpy) is loaded
+
+    # Memory-mapped arrays live in the shared page cache and can be dropped by the OS at any time.
+    if not isinstance(a, np.ndarray) or isinstance(a, np.memmap):
+        return 0
+    return int(a.nbytes)
+
+def view_nbytes(view: SharedView) -> int:
+    """Rough resident size of a view: owned arrays plus Python string payloads."""
+    index = view.index
+    n = _array_bytes(getattr(index, "_buf", None))
+    if isinstance(index.texts, list):
+        n += sum(len(t) for t in index.texts)
+    elif isinstance(index.texts, StoreTexts):  # paper rows are counted with the store below
+        n += sum(len(t) for t in index.texts.tail)
+    if isinstance(index.metadatas, list):
+        n += 200 * len(index.metadatas)
+    elif isinstance(index.metadatas, StoreMetas):
+        n += 200 * len(index.metadatas.tail)
+    if index.ann is not None:
+        n += sum(_array_bytes(a) for a in (index.ann.centroids, index.ann.assign, index.ann.codes, index.ann.scales))
+    if index.lexical is not None:
+        lex = index.lexical
+        n += sum(_array_bytes(a) for a in (lex._docs, lex._weights, lex._offsets))
+        n += sum(t.nbytes * 2 for t in lex._doc_terms) + 64 * len(lex.vocab)
+    if isinstance(view.papers, PaperStore):
+        n += view.papers.nbytes()
+    else:
+        n += sum(len(p.title) + len(p.summary) + 300 for p in view.papers)
+    return n + len(view.briefing) + len(view.web_signals)
+
+class ViewRegistry:
+    def __init__(self, max_bytes: int = 1 << 30, max_views: int = 64):
+        self.max_bytes = int(max_bytes)
+        self.max_views = int(max_views)
+        self._views: "OrderedDict[str, SharedView]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[SharedView]:
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                self.hits += 1
+            return view
+
+    def put(self, key: str, view: SharedView) -> SharedView:
+        size = view_nbytes(view)
+        with self._lock:
+            self._views[key] = view
+            self._views.move_to_end(key)
+            self._sizes[key] = size
+            self._evict(keep=key)
+        return view
+
+    def get_or_load(self, key: str, load: Callable[[], Optional[SharedView]]) -> Optional[SharedView]:
+        """Return the cached view or load it once, even when many sessions ask at the same time."""
+        view = self.get(key)
+        if view is not None:
+            return view
+        with self._lock:
+            gate = self._loading.setdefault(key, threading.Lock())
+        with gate:
+            view = self.get(key)
+            if view is not None:
+                return view
+            with self._lock:
+                self.misses += 1
+            view = load()
+            if view is not None:
+                self.put(key, view)
+        with self._lock:
+            self._loading.pop(key, None)
+        return view
+
+    def _evict(self, keep: str) -> None:
+        total = sum(self._sizes.values())
+        for key in list(self._views):
+            if total <= self.max_bytes and len(self._views) <= self.max_views:
+                break
+            if key == keep:
+                continue
+            self._views.pop(key)
+            total -= self._sizes.pop(key, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "views": len(self._views),
+                "bytes": sum(self._sizes.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from typing import Any, Dict
 import streamlit as st
 
 def inject_css() -> None:
@@ -67,3 +68,12 @@ def sidebar_help() -> None:
 - Generate **Industry Briefing**  
 - Ask questions in **Chat**"""
     )
+
+_STAGE_ICONS = {"pending": "⏸️", "running": "⏳", "done": "✅", "failed": "❌", "skipped": "➖"}
+
+def stage_progress(stages: Dict[str, Any]) -> str:
+    rows = []
+    for s in stages.values():
+        t = f"{s.elapsed_s:.1f}s" if s.started_at else ""
+        rows.append(f"{_STAGE_ICONS.get(s.state, '')} **{s.name}** {t} {s.detail}".rstrip())
+    return "  \n".join(rows)
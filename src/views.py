@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence
+
+from src.arxiv import Paper, load_papers, save_papers
+from src.paper_store import PaperStore, attach_store
+from src.utils import stable_hash
+
+if TYPE_CHECKING:
+    from src.rag import VectorIndex
+
+# A "view" is everything the app shows for one sidebar selection, saved under INDEX_DIR/<key>/:
+#   index/        saved VectorIndex (see index_store)
+#   papers.json   the fetched papers, in P# order
+#   briefing.md   optional briefing text
+#   view.json     when/how it was built
+# A view is written to a temporary directory and swapped into place, so readers see the old or
+# the new view as a whole. The app writes views after a fetch; `python -m src.worker`
+# precomputes them ahead of time.
+
+@dataclass
+class SavedView:
+    papers: PaperStore
+    index: VectorIndex
+    briefing: str = ""
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+def view_dir(root: str, category: str, keywords: str, max_results: int, embed_model: str, fulltext: bool = False) -> str:
+    key = stable_hash(f"{category}|{(keywords or '').strip()}|{max_results}|{embed_model}|{'full' if fulltext else 'abs'}")[:16]
+    return os.path.join(root, key)
+
+def _write_text(path: str, text: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def save_view(path: str, papers: Sequence[Paper], index: VectorIndex, *, briefing: str = "", meta: Dict[str, Any] | None = None) -> None:
+    from src.index_store import save_index  # numpy; view_dir() alone is used on first render
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = os.path.join(parent, f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+    os.makedirs(tmp)
+    try:
+        save_index(index, os.path.join(tmp, "index"))
+        save_papers(papers, os.path.join(tmp, "papers.json"))
+        if briefing:
+            _write_text(os.path.join(tmp, "briefing.md"), briefing)
+        info = {"saved_at": time.time(), "papers": len(papers), "rows": len(index), **(meta or {})}
+        _write_text(os.path.join(tmp, "view.json"), json.dumps(info, indent=2))
+
+        # Same swap as save_index: loaded views keep their memory maps of the old files.
+        old = None
+        if os.path.exists(path):
+            old = tmp + ".old"
+            os.replace(path, old)
+        os.replace(tmp, path)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+def save_briefing(path: str, briefing: str) -> None:
+    if os.path.isdir(path):
+        _write_text(os.path.join(path, "briefing.md"), briefing)
+
+def _read_meta(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, "view.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def load_view(path: str, *, attempts: int = 3) -> Optional[SavedView]:
+    """The view saved at `path`, or None if there is no complete one. view.json is read before
+    and after the other files; a load that overlapped a save is retried."""
+    from src.index_store import load_index
+
+    for _ in range(attempts):
+        meta = _read_meta(path)
+        if meta is None:
+            return None
+        try:
+            papers = PaperStore(load_papers(os.path.join(path, "papers.json")))
+            index = load_index(os.path.join(path, "index"))
+        except (OSError, ValueError):
+            if _read_meta(path) != meta:
+                continue  # the directory was swapped mid-read
+            raise
+        try:
+            with open(os.path.join(path, "briefing.md"), "r", encoding="utf-8") as f:
+                briefing = f.read()
+        except FileNotFoundError:
+            briefing = ""
+        if _read_meta(path) != meta:
+            continue
+        view = SavedView(papers=papers, index=index, briefing=briefing, meta=meta)
+        attach_store(view.index, view.papers)
+        return view
+    return None
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+# Headless digest builder: precomputes the index and briefing for every sidebar category and
+# saves them as views the app loads on first render instead of fetching.
+#   python -m src.worker --once
+#   python -m src.worker --at 06:00 --at 18:00 --processes 4
+#
+# arXiv fetches run one at a time in the parent process (its ~3 s politeness delay is per
+# process); embedding, topic clustering and briefing run per category in a process pool.
+# After the first run, a category's fetch is incremental: only papers new or updated since the
+# previous run are pulled (sync_papers) and merged into the saved digest's papers.
+
+import argparse
+import datetime as dt
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from src.arxiv import Paper, SyncState, build_query, fetch_papers, load_papers, sync_papers
+from src.briefing import generate_briefing
+from src.cache import CompletionCache, make_embedding_cache
+from src.clients import make_clients
+from src.config import CATEGORIES, DEFAULT_KEYWORDS, DEFAULT_MAX_RESULTS, Settings, get_settings
+from src.corpus import build_paper_index
+from src.dedup import canonical_id, dedup_papers, paper_topics
+from src.embeddings import EmbedOptions
+from src.metrics import tracer
+from src.paper_store import PaperStore
+from src.views import save_view, view_dir
+
+log = logging.getLogger("arxivpulse.worker")
+
+@dataclass(frozen=True)
+class DigestJob:
+    category: str
+    keywords: str
+    max_results: int
+    briefing: bool = True
+
+def merge_papers(previous: Sequence[Paper], changed: Sequence[Paper], n: int) -> List[Paper]:
+    """Newest `n` papers (by submission) of a previous digest updated with `changed` papers."""
+    by_id = {canonical_id(p.arxiv_id): p for p in previous}
+    for p in changed:
+        by_id[canonical_id(p.arxiv_id)] = p  # newer version replaces the old one
+    return sorted(by_id.values(), key=lambda p: p.published, reverse=True)[:n]
+
+# A sync mark to store once the digest built from the fetch is saved: (query key, updated, ids).
+PendingMark = Tuple[str, str, List[str]]
+
+def fetch_job(
+    job: DigestJob, settings: Settings, state: SyncState, *, full: bool = False
+) -> Tuple[List[Paper], Optional[PendingMark]]:
+    """The newest `job.max_results` papers of the job's query, plus the sync mark they bring the
+    query up to. With a saved digest and a sync mark, only papers changed since the last run are
+    fetched; if a whole window's worth changed, papers in the gap could be missing, so the full
+    window is refetched instead. The mark is not stored here: if the digest build fails, the
+    next run must fetch these papers again."""
+    key = build_query(job.category, job.keywords)
+    pending: List[PendingMark] = []
+    saved = os.path.join(view_dir(settings.index_dir, job.category, job.keywords, job.max_results, settings.openai_embed_model), "papers.json")
+    if not full and state.get(key) and os.path.exists(saved):
+        with tracer.span("worker.sync", category=job.category) as sp:
+            changed = list(sync_papers(
+                state, category=job.category, keyword_query=job.keywords,
+                max_results=job.max_results, page_size=job.max_results,
+                commit=lambda updated, ids: pending.append((key, updated, ids)),
+            ))
+            sp["changed"] = len(changed)
+        if len(changed) < job.max_results:
+            return merge_papers(load_papers(saved), changed, job.max_results), (pending[0] if pending else None)
+        log.info("sync %s: %d+ papers changed, refetching the window", job.category, len(changed))
+    with tracer.span("worker.fetch", category=job.category):
+        papers = fetch_papers(category=job.category, max_results=job.max_results, keyword_query=job.keywords, cache_ttl_s=0)
+    if not papers:
+        return papers, None
+    # Anything updated after the newest paper of this window is picked up by the next sync.
+    top = max(p.updated for p in papers)
+    return papers, (key, top, [p.arxiv_id for p in papers if p.updated == top])
+
+def build_digest(job: DigestJob, papers: Sequence[Paper], settings: Settings) -> Dict[str, object]:
+    """Embed, cluster and brief one category's papers and save the view. Runs in a pool process."""
+    t0 = time.perf_counter()
+    clients = make_clients(settings.openai_api_key)
+    emb_cache = make_embedding_cache(settings.emb_cache_backend, path=settings.emb_cache_path, max_entries=settings.emb_cache_max_entries)
+    llm_cache = CompletionCache(settings.llm_cache_path, ttl_s=settings.llm_cache_ttl_s, max_bytes=settings.llm_cache_max_mb << 20)
+    opts = EmbedOptions(max_workers=settings.embed_concurrency, max_batch_tokens=settings.embed_batch_tokens)
+
+    index = build_paper_index(clients.openai, settings.openai_embed_model, papers, emb_cache, opts)
+    briefing = ""
+    if job.briefing and papers:
+        labels = paper_topics(index, len(papers))
+        briefing = generate_briefing(clients.openai, settings.openai_chat_model, papers, cache=llm_cache, labels=labels.tolist())
+
+    path = view_dir(settings.index_dir, job.category, job.keywords, job.max_results, settings.openai_embed_model)
+    save_view(path, papers, index, briefing=briefing, meta={
+        "source": "worker",
+        "category": job.category,
+        "keywords": job.keywords,
+        "chat_model": settings.openai_chat_model,
+        "embed_model": settings.openai_embed_model,
+        "build_s": round(time.perf_counter() - t0, 3),
+    })
+    return {"category": job.category, "papers": len(papers), "path": path, "seconds": round(time.perf_counter() - t0, 2)}
+
+def run_once(jobs: Sequence[DigestJob], settings: Settings, *, processes: int = 4, full: bool = False) -> List[Dict[str, object]]:
+    results: List[Dict[str, object]] = []
+    state = SyncState(os.path.join(settings.index_dir, "sync.json"))
+    with ProcessPoolExecutor(max_workers=max(1, min(processes, len(jobs)))) as pool:
+        futs = {}
+        for job in jobs:
+            try:
+                fetched, mark = fetch_job(job, settings, state, full=full)
+            except Exception as e:
+                log.error("fetch %s failed: %s", job.category, e)
+                results.append({"category": job.category, "error": f"fetch: {e}"})
+                continue
+            papers = PaperStore(dedup_papers(fetched).papers)
+            log.info("fetched %s: %d papers (%d after dedup)", job.category, len(fetched), len(papers))
+            futs[pool.submit(build_digest, job, papers, settings)] = (job, mark)
+        for f in as_completed(futs):
+            job, mark = futs[f]
+            try:
+                res = f.result()
+                if mark is not None:  # only now are the fetched papers safely in the saved view
+                    state.set(*mark)
+                log.info("built %s: %s papers in %ss -> %s", job.category, res["papers"], res["seconds"], res["path"])
+            except Exception as e:
+                log.error("build %s failed: %s", job.category, e)
+                res = {"category": job.category, "error": str(e)}
+            results.append(res)
+    return results
+
+def next_run(times: Sequence[str], now: Optional[dt.datetime] = None) -> dt.datetime:
+    """Next local datetime matching one of the HH:MM `times`."""
+    now = now or dt.datetime.now()
+    candidates = []
+    for t in times:
+        hh, mm = (int(x) for x in t.split(":"))
+        at = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+        candidates.append(at if at > now else at + dt.timedelta(days=1))
+    return min(candidates)
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Precompute ArxivPulse category digests (index + briefing).")
+    ap.add_argument("--categories", default=",".join(CATEGORIES))
+    ap.add_argument("--keywords", default=DEFAULT_KEYWORDS)
+    ap.add_argument("--max-results", type=int, default=DEFAULT_MAX_RESULTS)
+    ap.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1))
+    ap.add_argument("--no-briefing", action="store_true")
+    ap.add_argument("--at", action="append", default=[], metavar="HH:MM", help="daily run time (local); repeatable")
+    ap.add_argument("--once", action="store_true", help="run now and exit (the default without --at)")
+    ap.add_argument("--full", action="store_true", help="refetch every window instead of syncing changes")
+    args = ap.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    settings = get_settings()
+    tracer.set_trace_path(settings.metrics_trace_path)
+    jobs = [
+        DigestJob(c.strip(), args.keywords, args.max_results, briefing=not args.no_briefing)
+        for c in args.categories.split(",") if c.strip()
+    ]
+
+    if args.once or not args.at:
+        run_once(jobs, settings, processes=args.processes, full=args.full)
+        return
+    while True:
+        at = next_run(args.at)
+        log.info("next run at %s", at.isoformat(timespec="minutes"))
+        time.sleep(max(0.0, (at - dt.datetime.now()).total_seconds()))
+        run_once(jobs, settings, processes=args.processes, full=args.full)
+
+if __name__ == "__main__":
+    main()